@@ -0,0 +1,243 @@
+### Times the data-access functions on generated databases of several sizes, run from the repo root: ###
+### python -m benchmarks.bench_data_access [--scales small,medium] [--runs 50] [--out file.json] [--compare old.json] ###
+import io
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import logging
+import sqlite3
+import argparse
+import platform
+import subprocess
+import statistics
+from datetime import datetime, timezone
+import streamlit as st
+from db import db_connection, db_stats
+from db.db_connection import connection
+from db.db_cache import get_cache
+from db.db_migrations import migrate
+from db import db_functions_users as users
+from db import db_functions_trips as trips
+from db import db_functions_usertrips as usertrips
+from db.db_import_export import export_trips, import_trips, import_users_csv
+from db.db_passwords import hash_password
+from benchmarks.gen_data import generate, PASSWORD
+
+SCALES = {
+    "small": dict(managers=10, employees=20, trips=2000),
+    "medium": dict(managers=50, employees=40, trips=20000),
+    "large": dict(managers=200, employees=100, trips=200000),
+}
+PAGE_SIZE = 25
+IMPORT_ROWS = 100
+
+### IDs and names drawn from the generated data, so every run hits a different row ###
+class Context:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        with connection() as conn:
+            self.managers = [row[0] for row in conn.execute("SELECT user_ID FROM users WHERE role = 'Manager'")]
+            self.usernames = [row[0] for row in conn.execute("SELECT username FROM users WHERE role = 'User'")]
+            self.user_IDs = [row[0] for row in conn.execute("SELECT user_ID FROM users WHERE role = 'User'")]
+            self.team = {}
+            self.team_names = {}
+            for user_ID, username, manager_ID in conn.execute("SELECT user_ID, username, manager_ID FROM users WHERE role = 'User'"):
+                self.team.setdefault(manager_ID, []).append(user_ID)
+                self.team_names.setdefault(manager_ID, []).append(username)
+            self.trips = [tuple(row) for row in conn.execute("SELECT trip_ID, manager_ID FROM trips")]
+        self.rng.shuffle(self.trips)
+
+    def manager(self) -> int:
+        return self.rng.choice(self.managers)
+
+    def session(self, user_ID: int, role: str, sortkey: int):
+        st.session_state["user_ID"] = user_ID
+        st.session_state["role"] = role
+        st.session_state["role_sortkey"] = sortkey
+
+### name -> (runs divisor, cold cache, factory(ctx) returning the timed call) ###
+def _cases() -> dict:
+    def as_manager(ctx):
+        ctx.session(ctx.manager(), "Manager", 2)
+
+    def trip_details(ctx):
+        manager_ID = ctx.manager()
+        ctx.session(manager_ID, "Manager", 2)
+        page, _ = trips.load_trip_page(manager_ID, PAGE_SIZE)
+        return trips.load_trip_details(manager_ID, page)
+
+    def add_trip(ctx):
+        manager_ID = ctx.manager()
+        members = ctx.team.get(manager_ID, [])
+        trips.add_trip("Bench", "2026-05-04", "2026-05-08", "Benchmark", ctx.rng.sample(members, min(3, len(members))), manager_ID)
+
+    def update_participants(ctx):
+        trip_ID, manager_ID = ctx.rng.choice(ctx.trips)
+        members = ctx.team.get(manager_ID, [])
+        usertrips.update_trip_participants(trip_ID, ctx.rng.sample(members, min(4, len(members))))
+
+    def del_trip(ctx):
+        trip_ID, manager_ID = ctx.trips.pop()
+        trips.del_trip(trip_ID, manager_ID)
+
+    def conflicts(ctx):
+        members = ctx.team.get(ctx.manager(), [])
+        with connection() as conn:
+            return usertrips.find_conflicts(conn, members, "2026-03-01", "2026-03-14")
+
+    def trip_conflicts(ctx):
+        trip_ID, manager_ID = ctx.rng.choice(ctx.trips)
+        members = ctx.team.get(manager_ID, [])
+        return usertrips.participant_conflicts(trip_ID, ctx.rng.sample(members, min(4, len(members))))
+
+    #imports write new rows every run: unique usernames, passwords hashed once up front
+    #(plaintext hashing is bench_passwords' business, it would swamp the import itself)
+    imported = itertools.count()
+    stored = hash_password(PASSWORD)
+
+    def import_users(ctx):
+        batch = next(imported)
+        lines = ["username,password,email,role"]
+        lines += [f"import_{batch}_{i},{stored},,User" for i in range(IMPORT_ROWS)]
+        return import_users_csv(io.BytesIO("\n".join(lines).encode()), ["User"], manager_ID=ctx.manager())
+
+    def import_trip_rows(ctx):
+        manager_ID = ctx.manager()
+        names = ctx.team_names.get(manager_ID, [])
+        lines = ["trip_ID,destination,start_date,end_date,occasion,participants"]
+        lines += [
+            f",Bench,2026-05-04,2026-05-08,Import,{';'.join(ctx.rng.sample(names, min(3, len(names))))}"
+            for _ in range(IMPORT_ROWS)
+        ]
+        return import_trips(io.BytesIO("\n".join(lines).encode()), manager_ID)
+
+    cases = {
+        "get_user_ID": (1, True, lambda ctx: users.get_user_ID(ctx.rng.choice(ctx.usernames))),
+        "get_manager_ID": (1, True, lambda ctx: users.get_manager_ID(ctx.rng.choice(ctx.usernames))),
+        "get_role_sortkey": (1, True, lambda ctx: users.get_role_sortkey("User")),
+        "list_roles_editable": (1, True, lambda ctx: (as_manager(ctx), users.list_roles_editable())),
+        "get_users_for_current_manager": (1, True, lambda ctx: (as_manager(ctx), users.get_users_for_current_manager())),
+        "search_users (first page)": (1, True, lambda ctx: users.search_users(3)),
+        "search_users (prefix)": (1, True, lambda ctx: users.search_users(3, ctx.rng.choice(ctx.usernames)[:6])),
+        "search_users (deep, by email)": (1, True, lambda ctx: users.search_users(3, sort="email", after=(ctx.rng.choice(ctx.usernames), 0))),
+        "get_user_by_credentials": (10, True, lambda ctx: users.get_user_by_credentials(ctx.rng.choice(ctx.usernames), PASSWORD)),
+        "load_trip_page (first)": (1, True, lambda ctx: trips.load_trip_page(ctx.manager(), PAGE_SIZE)),
+        "load_trip_page (deep)": (1, True, lambda ctx: trips.load_trip_page(ctx.manager(), PAGE_SIZE, ("2026-06-01", 0))),
+        "load_trip_details": (1, True, trip_details),
+        "add_trip": (1, False, add_trip),
+        "update_trip_participants": (1, False, update_participants),
+        "del_trip": (1, False, del_trip),
+        "export_trips (csv, 1 year)": (5, False, lambda ctx: export_trips(ctx.manager(), "2025-01-01", "2025-12-31")),
+        "get_user_trips": (1, True, lambda ctx: usertrips.get_user_trips(ctx.rng.choice(ctx.user_IDs))),
+        "user_has_trips": (1, True, lambda ctx: usertrips.user_has_trips(ctx.rng.choice(ctx.user_IDs))),
+        "get_subtree_users": (1, True, lambda ctx: users.get_subtree_users(ctx.manager(), 2)),
+        "find_conflicts (team, 2 weeks)": (1, False, conflicts),
+        "participant_conflicts": (1, False, trip_conflicts),
+        f"import_users_csv ({IMPORT_ROWS} rows)": (5, False, import_users),
+        f"import_trips (csv, {IMPORT_ROWS} rows)": (5, False, import_trip_rows),
+    }
+    return cases
+
+def _time(call, ctx, runs: int, cold: bool) -> list:
+    durations = []
+    for _ in range(runs):
+        if cold:
+            get_cache().clear()
+        start = time.perf_counter()
+        call(ctx)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+def _open(path: str, scale: dict, reuse: bool, seed: int) -> dict:
+    if reuse and os.path.exists(path):
+        db_connection.DB_PATH = path
+        migrate()
+        return dict(scale, reused=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return generate(path, seed=seed, **scale)
+
+def bench_scale(name: str, runs: int, reuse: bool, seed: int) -> tuple[dict, list]:
+    start = time.perf_counter()
+    counts = _open(f"benchmarks/bench_{name}.db", SCALES[name], reuse, seed)
+    counts["generate_seconds"] = round(time.perf_counter() - start, 2)
+    get_cache().clear()
+    ctx = Context(seed)
+
+    results = []
+    for case, (divisor, cold, call) in _cases().items():
+        case_runs = max(1, runs // divisor)
+        durations = sorted(_time(call, ctx, case_runs, cold))
+        results.append({
+            "scale": name,
+            "function": case,
+            "cold_cache": cold,
+            "runs": case_runs,
+            "mean_ms": round(statistics.fmean(durations), 3),
+            "p50_ms": round(durations[len(durations) // 2], 3),
+            "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+            "max_ms": round(durations[-1], 3),
+        })
+    return counts, results
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+### p50 of this run against an earlier results file, per scale and function ###
+def compare(results: list, old_path: str):
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["scale"], r["function"]): r for r in json.load(f)["results"]}
+    print(f"\n{'scale':<7} {'function':<30} {'old p50':>9} {'new p50':>9} {'ratio':>6}")
+    for row in results:
+        before = old.get((row["scale"], row["function"]))
+        if before and before["p50_ms"]:
+            ratio = row["p50_ms"] / before["p50_ms"]
+            print(f"{row['scale']:<7} {row['function']:<30} {before['p50_ms']:>9} {row['p50_ms']:>9} {ratio:>6.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="small,medium", help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reuse", action="store_true", help="keep databases generated by an earlier run")
+    parser.add_argument("--out", help="JSON file, default benchmarks/results/data_access-<time>.json")
+    parser.add_argument("--compare", help="earlier JSON file to compare p50s against")
+    args = parser.parse_args()
+
+    # bare mode: no Streamlit runtime, so silence its context warnings
+    logging.disable(logging.WARNING)
+
+    report = {
+        "benchmark": "data_access",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "query_stats": db_stats.ENABLED,
+        "runs": args.runs,
+        "scales": {},
+        "results": [],
+    }
+    print(f"{'scale':<7} {'function':<30} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name in args.scales.split(","):
+        counts, results = bench_scale(name, args.runs, args.reuse, args.seed)
+        report["scales"][name] = counts
+        report["results"].extend(results)
+        for row in results:
+            print(f"{row['scale']:<7} {row['function']:<30} {row['runs']:>5} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['max_ms']:>9}")
+
+    out = args.out or f"benchmarks/results/data_access-{datetime.now():%Y%m%d-%H%M%S}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwritten to {out}", file=sys.stderr)
+
+    if args.compare:
+        compare(report["results"], args.compare)
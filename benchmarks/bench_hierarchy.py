@@ -0,0 +1,173 @@
+### Manager tree lookups, closure table against a recursive CTE on users.manager_ID, run from the repo root: ###
+### (both CTEs are written so every step is an index lookup, a plain join gets a Bloom filter that scans users per step) ###
+### python -m benchmarks.bench_hierarchy [--nodes 50000] [--fanout 8] [--runs 50] [--out file.json] ###
+import os
+import sys
+import json
+import time
+import random
+import logging
+import sqlite3
+import argparse
+import statistics
+from datetime import datetime, timezone
+from db import db_connection
+from db.db_connection import connection
+from db.db_cache import get_cache
+from db.db_migrations import migrate, rebuild_user_hierarchy
+from db.db_functions_users import get_subtree_users, is_below
+
+SUBTREE_CTE = """
+    WITH RECURSIVE sub(user_ID, depth) AS (
+        SELECT user_ID, 1 FROM users WHERE manager_ID = ? AND user_ID IS NOT manager_ID
+        UNION ALL
+        SELECT u.user_ID, s.depth + 1 FROM sub s JOIN users u ON u.manager_ID = s.user_ID AND u.user_ID <> s.user_ID
+    )
+    SELECT u.user_ID, u.username, u.email, u.role, s.depth FROM sub s JOIN users u ON u.user_ID = s.user_ID
+"""
+ANCESTOR_CTE = """
+    WITH RECURSIVE up(user_ID) AS (
+        SELECT manager_ID FROM users WHERE user_ID = ? AND manager_ID IS NOT user_ID
+        UNION ALL
+        SELECT (SELECT u.manager_ID FROM users u WHERE u.user_ID = up.user_ID AND u.manager_ID IS NOT u.user_ID)
+        FROM up WHERE up.user_ID IS NOT NULL
+    )
+    SELECT 1 FROM up WHERE user_ID = ? LIMIT 1
+"""
+
+### k-ary tree: node 1 is its own manager, node i reports to (i - 2) // fanout + 1; inner nodes are managers ###
+def build_tree(path: str, nodes: int, fanout: int) -> dict:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db_connection.DB_PATH = path
+    migrate()
+    parents = [None, 1] + [(i - 2) // fanout + 1 for i in range(2, nodes + 1)]
+    inner = set(parents[2:])
+    rows = [
+        (i, f"node{i}", "x", f"node{i}@example.com", "Manager" if i in inner else "User", parents[i])
+        for i in range(1, nodes + 1)
+    ]
+    with connection() as conn:
+        start = time.perf_counter()
+        conn.executemany("INSERT INTO users (user_ID, username, password, email, role, manager_ID) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        insert_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuild_user_hierarchy(conn.cursor())
+        conn.commit()
+        rebuild_seconds = time.perf_counter() - start
+        conn.execute("ANALYZE")
+        closure_rows, max_depth = conn.execute("SELECT count(*), max(depth) FROM user_hierarchy").fetchone()
+    return {
+        "nodes": nodes,
+        "fanout": fanout,
+        "max_depth": max_depth,
+        "closure_rows": closure_rows,
+        "insert_with_triggers_s": round(insert_seconds, 2),
+        "rebuild_s": round(rebuild_seconds, 2),
+    }
+
+def _by_depth(depth: int) -> list:
+    with connection() as conn:
+        return [row[0] for row in conn.execute("SELECT descendant_ID FROM user_hierarchy WHERE ancestor_ID = 1 AND depth = ?", (depth,))]
+
+def _cte_subtree(manager_ID: int):
+    with connection() as conn:
+        return conn.execute(SUBTREE_CTE, (manager_ID,)).fetchall()
+
+def _cte_is_below(manager_ID: int, user_ID: int) -> bool:
+    with connection() as conn:
+        return conn.execute(ANCESTOR_CTE, (user_ID, manager_ID)).fetchone() is not None
+
+### name -> factory(rng) returning the timed call ###
+def _cases(max_depth: int) -> dict:
+    top = _by_depth(1)
+    middle = _by_depth(max(1, max_depth - 2))
+    leaves = _by_depth(max_depth)
+    moved = _by_depth(2)
+    counter = iter(range(10 ** 9))
+
+    def add_leaf(rng):
+        with connection() as conn:
+            conn.execute(
+                "INSERT INTO users (username, password, role, manager_ID) VALUES (?, 'x', 'User', ?)",
+                (f"bench{next(counter)}", rng.choice(middle))
+            )
+            conn.commit()
+
+    def move_subtree(rng):
+        with connection() as conn:
+            conn.execute("UPDATE users SET manager_ID = ? WHERE user_ID = ?", (rng.choice(top), rng.choice(moved)))
+            conn.commit()
+
+    def delete_leaf(rng):
+        with connection() as conn:
+            conn.execute("DELETE FROM users WHERE user_ID = ?", (leaves.pop(),))
+            conn.commit()
+
+    return {
+        "subtree depth 1 (closure)": lambda rng: get_subtree_users(rng.choice(top)),
+        "subtree depth 1 (cte)": lambda rng: _cte_subtree(rng.choice(top)),
+        f"subtree depth {max(1, max_depth - 2)} (closure)": lambda rng: get_subtree_users(rng.choice(middle)),
+        f"subtree depth {max(1, max_depth - 2)} (cte)": lambda rng: _cte_subtree(rng.choice(middle)),
+        "is_below (closure)": lambda rng: is_below(rng.choice(top), rng.choice(leaves)),
+        "is_below (cte)": lambda rng: _cte_is_below(rng.choice(top), rng.choice(leaves)),
+        "add leaf": add_leaf,
+        "move depth-2 subtree": move_subtree,
+        "delete leaf": delete_leaf,
+    }
+
+def bench(runs: int, max_depth: int, seed: int) -> list:
+    rng = random.Random(seed)
+    results = []
+    for case, call in _cases(max_depth).items():
+        durations = []
+        for _ in range(runs):
+            # subtree results are cached per users version, every lookup here should hit the database
+            get_cache().clear()
+            start = time.perf_counter()
+            call(rng)
+            durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        results.append({
+            "function": case,
+            "runs": runs,
+            "mean_ms": round(statistics.fmean(durations), 3),
+            "p50_ms": round(durations[len(durations) // 2], 3),
+            "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+            "max_ms": round(durations[-1], 3),
+        })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="benchmarks/bench_hierarchy.db")
+    parser.add_argument("--nodes", type=int, default=50000)
+    parser.add_argument("--fanout", type=int, default=8, help="reports per manager")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSON file, default benchmarks/results/hierarchy-<time>.json")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    tree = build_tree(args.db, args.nodes, args.fanout)
+    print(f"{tree['nodes']} nodes, depth {tree['max_depth']}, {tree['closure_rows']} closure rows: "
+          f"insert with triggers {tree['insert_with_triggers_s']}s, rebuild {tree['rebuild_s']}s")
+    results = bench(args.runs, tree["max_depth"], args.seed)
+    print(f"\n{'function':<30} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for row in results:
+        print(f"{row['function']:<30} {row['runs']:>5} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['max_ms']:>9}")
+
+    report = {
+        "benchmark": "hierarchy",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sqlite": sqlite3.sqlite_version,
+        "tree": tree,
+        "results": results,
+    }
+    out = args.out or f"benchmarks/results/hierarchy-{datetime.now():%Y%m%d-%H%M%S}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwritten to {out}", file=sys.stderr)
@@ -0,0 +1,40 @@
+### Logins per second for each scrypt cost setting, run from the repo root: ###
+### python -m benchmarks.bench_passwords [--logins 64] [--workers 4] ###
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from db.db_passwords import hash_password, verify_password
+
+COST_SETTINGS = [
+    (2 ** 12, 8, 1),
+    (2 ** 13, 8, 1),
+    (2 ** 14, 8, 1),
+    (2 ** 15, 8, 1),
+]
+
+def bench(n: int, r: int, p: int, logins: int, workers: int) -> dict:
+    stored = hash_password("correct horse", n=n, r=r, p=p)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: verify_password("correct horse", stored)[0], range(logins)))
+        elapsed = time.perf_counter() - start
+    assert all(results)
+    return {
+        "n": n, "r": r, "p": p,
+        "logins": logins,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 1),
+        "ms_per_login": round(elapsed / logins * 1000 * workers, 1),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'n':>7} {'r':>2} {'p':>2} {'logins/s':>10} {'ms/login':>9}")
+    for n, r, p in COST_SETTINGS:
+        row = bench(n, r, p, args.logins, args.workers)
+        print(f"{row['n']:>7} {row['r']:>2} {row['p']:>2} {row['logins_per_second']:>10} {row['ms_per_login']:>9}")
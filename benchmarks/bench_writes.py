@@ -0,0 +1,117 @@
+### Concurrent writers with and without the write-behind queue, run from the repo root: ###
+### python -m benchmarks.bench_writes [--threads 1,4,16] [--writes 200] [--out file.json] ###
+### Every thread adds trips and updates participants through the app functions, once committing on pooled ###
+### connections and once through the single writer; every run uses a freshly generated database ###
+import os
+import sys
+import json
+import time
+import random
+import logging
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timezone
+from db import db_connection, db_writer
+from db.db_connection import connection
+from db.db_functions_trips import add_trip
+from db.db_functions_usertrips import update_trip_participants
+from benchmarks.gen_data import generate
+
+MODES = {"direct": False, "write-behind": True}
+
+def _fresh(path: str, seed: int) -> dict:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    generate(path, managers=20, employees=20, trips=2000, seed=seed)
+    team = {}
+    with connection() as conn:
+        for user_ID, manager_ID in conn.execute("SELECT user_ID, manager_ID FROM users WHERE role = 'User'"):
+            team.setdefault(manager_ID, []).append(user_ID)
+        trips = [tuple(row) for row in conn.execute("SELECT trip_ID, manager_ID FROM trips")]
+    return {"team": team, "trips": trips}
+
+def _worker(data: dict, writes: int, seed: int, samples: list, errors: list):
+    rng = random.Random(seed)
+    for _ in range(writes):
+        start = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                manager_ID = rng.choice(list(data["team"]))
+                if not add_trip("Bench", "2026-05-04", "2026-05-08", "Benchmark", rng.sample(data["team"][manager_ID], 3), manager_ID):
+                    errors.append("add_trip: not saved")
+            else:
+                trip_ID, manager_ID = rng.choice(data["trips"])
+                update_trip_participants(trip_ID, rng.sample(data["team"][manager_ID], 4))
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        samples.append((time.perf_counter() - start) * 1000)
+
+def run(mode: str, threads: int, writes: int, path: str, seed: int) -> dict:
+    #pools and writers are per file, so every run gets its own file rather than reusing a deleted one
+    root, ext = os.path.splitext(path)
+    data = _fresh(f"{root}_{mode}_{threads}{ext}", seed)
+    db_writer.WRITE_BEHIND = MODES[mode]
+    writer = db_writer.get_writer(db_connection.DB_PATH) if MODES[mode] else None
+    batches_before = writer.batches if writer else 0
+
+    samples, errors = [], []
+    workers = [
+        threading.Thread(target=_worker, args=(data, writes, seed + i, samples, errors))
+        for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    samples.sort()
+    batches = writer.batches - batches_before if writer else len(samples)
+    return {
+        "mode": mode,
+        "threads": threads,
+        "writes": len(samples),
+        "seconds": round(elapsed, 2),
+        "writes_per_s": round(len(samples) / elapsed, 1),
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+        "commits": batches,
+        "errors": len(errors),
+        "locked": sum("locked" in e for e in errors),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="benchmarks/bench_writes.db")
+    parser.add_argument("--threads", default="1,4,16", help="comma-separated writer thread counts")
+    parser.add_argument("--writes", type=int, default=200, help="per thread")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSON file, default benchmarks/results/writes-<time>.json")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = []
+    print(f"{'mode':<13} {'threads':>7} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'commits':>8} {'errors':>7}")
+    for threads in map(int, args.threads.split(",")):
+        for mode in MODES:
+            row = run(mode, threads, args.writes, args.db, args.seed)
+            results.append(row)
+            print(f"{mode:<13} {threads:>7} {row['writes_per_s']:>9} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['commits']:>8} {row['errors']:>7}")
+
+    report = {
+        "benchmark": "writes",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sqlite": sqlite3.sqlite_version,
+        "pool_size": db_connection.POOL_SIZE,
+        "max_batch": db_writer.MAX_BATCH,
+        "results": results,
+    }
+    out = args.out or f"benchmarks/results/writes-{datetime.now():%Y%m%d-%H%M%S}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwritten to {out}", file=sys.stderr)
@@ -0,0 +1,111 @@
+### Synthetic users.db: N managers with M employees each and K trips, run from the repo root: ###
+### python -m benchmarks.gen_data --managers 50 --employees 40 --trips 20000 [--db benchmarks/bench.db] ###
+import os
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from db import db_connection
+from db.db_connection import connection
+from db.db_migrations import migrate
+from db.db_passwords import hash_password
+
+PASSWORD = "123"
+DESTINATIONS = [
+    "Berlin", "Zurich", "Vienna", "Paris", "London", "Madrid", "Rome", "Amsterdam", "Oslo", "Prague",
+    "New York", "Chicago", "Toronto", "Singapore", "Tokyo", "Sydney", "Dubai", "Lisbon", "Warsaw", "Dublin",
+]
+OCCASIONS = ["Fair", "Customer visit", "Conference", "Workshop", "Training", "Kick-off", "Audit", None]
+FIRST_DATE = date(2024, 1, 1)
+DATE_SPAN_DAYS = 3 * 365
+BATCH = 10000
+
+def _batched(rows):
+    for i in range(0, len(rows), BATCH):
+        yield rows[i:i + BATCH]
+
+### Number of participants: mostly small groups, a few large ones, at least one ###
+def _fanout(rng: random.Random, mean: float, limit: int) -> int:
+    if limit <= 0:
+        return 0
+    extra = rng.expovariate(1 / (mean - 1)) if mean > 1 else 0
+    return min(limit, 1 + int(extra))
+
+### Creates a fresh database at `path` and fills it; IDs are assigned here, so the file must not exist ###
+def generate(path: str, managers: int, employees: int, trips: int, fanout: float = 4.0, seed: int = 0) -> dict:
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    rng = random.Random(seed)
+    db_connection.DB_PATH = path
+    migrate()
+
+    # one hash for every account, scrypt for each of them would dominate the run
+    password = hash_password(PASSWORD)
+    users = [(1, "admin", password, "admin@example.com", "Administrator", None)]
+    team = {}
+    next_ID = 2
+    for m in range(managers):
+        manager_ID = next_ID
+        next_ID += 1
+        users.append((manager_ID, f"manager{m}", password, f"manager{m}@example.com", "Manager", manager_ID))
+        team[manager_ID] = list(range(next_ID, next_ID + employees))
+        for e in range(employees):
+            users.append((next_ID, f"user{m}_{e}", password, f"user{m}_{e}@example.com", "User", manager_ID))
+            next_ID += 1
+
+    trip_rows = []
+    participant_rows = []
+    manager_IDs = list(team)
+    for trip_ID in range(1, trips + 1):
+        manager_ID = rng.choice(manager_IDs)
+        start = FIRST_DATE + timedelta(days=rng.randrange(DATE_SPAN_DAYS))
+        end = start + timedelta(days=rng.randrange(14))
+        trip_rows.append((
+            trip_ID, rng.choice(DESTINATIONS), start.isoformat(), end.isoformat(),
+            rng.choice(OCCASIONS), manager_ID
+        ))
+        members = team[manager_ID]
+        for user_ID in rng.sample(members, _fanout(rng, fanout, len(members))):
+            participant_rows.append((trip_ID, user_ID))
+
+    with connection() as conn:
+        for batch in _batched(users):
+            conn.executemany(
+                "INSERT INTO users (user_ID, username, password, email, role, manager_ID) VALUES (?, ?, ?, ?, ?, ?)",
+                batch
+            )
+        for batch in _batched(trip_rows):
+            conn.executemany(
+                "INSERT INTO trips (trip_ID, destination, start_date, end_date, occasion, manager_ID) VALUES (?, ?, ?, ?, ?, ?)",
+                batch
+            )
+        for batch in _batched(participant_rows):
+            conn.executemany("INSERT INTO user_trips (trip_ID, user_ID) VALUES (?, ?)", batch)
+        conn.commit()
+        conn.execute("ANALYZE")
+
+    return {
+        "managers": managers,
+        "employees": managers * employees,
+        "trips": trips,
+        "participants": len(participant_rows),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="benchmarks/bench.db")
+    parser.add_argument("--managers", type=int, default=50)
+    parser.add_argument("--employees", type=int, default=40, help="per manager")
+    parser.add_argument("--trips", type=int, default=20000)
+    parser.add_argument("--fanout", type=float, default=4.0, help="mean participants per trip")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replace", action="store_true", help="delete an existing file first")
+    args = parser.parse_args()
+
+    if args.replace:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    start = time.perf_counter()
+    counts = generate(args.db, args.managers, args.employees, args.trips, args.fanout, args.seed)
+    print(f"{args.db}: {counts} in {time.perf_counter() - start:.1f}s (password for every account: {PASSWORD})")
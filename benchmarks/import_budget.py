@@ -0,0 +1,74 @@
+### Cold start of main.py and every page, each in a fresh interpreter, run from the repo root: ###
+### python -m benchmarks.import_budget [--budget-ms 750] [--repeat 3] [--out file.json] ###
+### streamlit itself is imported before the clock starts, so only the app's own imports and first run count; ###
+### exits with 1 if any script's best run is over the budget ###
+import os
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["main.py", "pages/admin_overview.py", "pages/manager_overview.py", "pages/user_overview.py"]
+#modules that should only be loaded once a table or export needs them
+HEAVY = ["pandas", "pyarrow", "numpy"]
+
+PROBE = """
+import sys, time, json, logging
+logging.disable(logging.CRITICAL)
+import streamlit
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+seconds = time.perf_counter() - start
+print(json.dumps({
+    "ms": round(seconds * 1000, 1),
+    "modules": len(set(sys.modules) - before),
+    "heavy": [m for m in sys.argv[2:] if m in sys.modules],
+    "errors": [str(e.value) for e in at.exception],
+}))
+"""
+
+def measure(script: str, db: str) -> dict:
+    env = dict(os.environ, USERS_DB=db, QUERY_STATS="0")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, os.path.join(ROOT, script), *HEAVY],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=750)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per script, the best run counts")
+    parser.add_argument("--db", default="benchmarks/import_budget.db", help="scratch database the pages migrate")
+    parser.add_argument("--out", help="JSON file, default benchmarks/results/import_budget-<time>.json")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'script':<28} {'best ms':>8} {'worst ms':>9} {'modules':>8}  heavy imports")
+    for script in SCRIPTS:
+        runs = [measure(script, os.path.abspath(args.db)) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["ms"])
+        row = {
+            "script": script,
+            "best_ms": best["ms"],
+            "worst_ms": max(run["ms"] for run in runs),
+            "modules": best["modules"],
+            "heavy": best["heavy"],
+            "errors": best["errors"],
+            "over_budget": best["ms"] > args.budget_ms,
+        }
+        results.append(row)
+        flag = "  OVER BUDGET" if row["over_budget"] else ""
+        print(f"{script:<28} {row['best_ms']:>8} {row['worst_ms']:>9} {row['modules']:>8}  {', '.join(row['heavy']) or '-'}{flag}")
+
+    out = args.out or f"benchmarks/results/import_budget-{datetime.now():%Y%m%d-%H%M%S}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"budget_ms": args.budget_ms, "results": results}, f, indent=2)
+    print(f"\nwritten to {out}", file=sys.stderr)
+
+    sys.exit(1 if any(row["over_budget"] for row in results) else 0)
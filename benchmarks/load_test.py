@@ -0,0 +1,246 @@
+### Concurrent sessions against one SQLite file, driven through Streamlit AppTest, run from the repo root: ###
+### python -m benchmarks.load_test [--sessions 200] [--iterations 5] [--write-ratio 0.3] [--processes 4] [--out file.json] ###
+### AppTest swaps process globals (Runtime instance, config) per run, so runs cannot overlap in threads: ###
+### every process interleaves its sessions one action at a time, and the processes run in parallel ###
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from streamlit.testing.v1 import AppTest
+from db import db_connection
+from benchmarks.gen_data import generate, PASSWORD
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    "Administrator": "pages/admin_overview.py",
+    "Manager": "pages/manager_overview.py",
+    "User": "pages/user_overview.py",
+}
+#share of sessions per role
+ROLE_MIX = {"Manager": 0.3, "User": 0.65, "Administrator": 0.05}
+TIMEOUT_S = 120
+
+### Messages of exceptions and st.error elements of the last run ###
+def _errors(at) -> list:
+    return [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+
+### One simulated browser session: login, then `iterations` page actions ###
+class Session:
+    def __init__(self, username: str, role: str, rng: random.Random, record):
+        self.username = username
+        self.role = role
+        self.rng = rng
+        self.record = record
+        self.at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=TIMEOUT_S)
+
+    def _timed(self, action: str, step):
+        start = time.perf_counter()
+        try:
+            step()
+            errors = _errors(self.at)
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"]
+        self.record(f"{self.role}:{action}", time.perf_counter() - start, errors)
+        return not errors
+
+    def login(self) -> bool:
+        def step():
+            self.at.run()
+            self.at.text_input[0].input(self.username)
+            self.at.text_input[1].input(PASSWORD)
+            self.at.button[0].click().run()
+        if not self._timed("login", step) or "principal" not in self.at.session_state:
+            return False
+        # stay on the role's page for all further reruns
+        self.at.switch_page(PAGES[self.role])
+        return True
+
+    def _button(self, label: str):
+        return next(b for b in self.at.button if b.label == label)
+
+    def _input(self, label: str):
+        return next(t for t in self.at.text_input if t.label == label)
+
+    def read(self):
+        if self.role == "Manager" and self.rng.random() < 0.5:
+            self._timed("open_trip", self._open_trip)
+        else:
+            self._timed("view", self.at.run)
+
+    def _open_trip(self):
+        self.at.run()
+        trip_IDs = [e.label.split(" — ")[0] for e in self.at.expander if " — " in e.label]
+        if trip_IDs:
+            self.at.session_state[f"trip_expander_{self.rng.choice(trip_IDs)}"] = True
+            self.at.run()
+
+    def write(self):
+        if self.role == "Manager":
+            if self.rng.random() < 0.5:
+                self._timed("create_trip", self._create_trip)
+            else:
+                self._timed("update_participants", self._update_participants)
+        elif self.role == "Administrator":
+            self._timed("register_user", self._register_user)
+        else:
+            self._timed("edit_profile", self._edit_profile)
+
+    def _create_trip(self):
+        self._input("Destination").input(f"Load {self.rng.randrange(10 ** 6)}")
+        self._button("invite").click().run()
+
+    def _update_participants(self):
+        self._open_trip()
+        selects = [m for m in self.at.multiselect if m.label == "Select participants"]
+        if selects:
+            options = selects[0].options
+            selects[0].set_value(self.rng.sample(options, self.rng.randint(0, min(4, len(options)))))
+            self._button("Update participants").click().run()
+
+    def _register_user(self):
+        name = f"load{self.rng.randrange(10 ** 9)}"
+        self._input("Username").input(name)
+        self._input("Password").input(PASSWORD)
+        self._input("Confirm password").input(PASSWORD)
+        self._button("Register").click().run()
+
+    def _edit_profile(self):
+        self._input("E-Mail").input(f"{self.username}+{self.rng.randrange(1000)}@example.com")
+        self._button("Safe changes").click().run()
+
+    ### One action per step, so many sessions can be interleaved ###
+    def steps(self, iterations: int, write_ratio: float):
+        if not self.login():
+            return
+        yield
+        self._timed("view", self.at.run)
+        for _ in range(iterations):
+            yield
+            if self.rng.random() < write_ratio:
+                self.write()
+            else:
+                self.read()
+
+### Runs the given sessions in this process, interleaved at random, returns [(action, seconds, errors)] ###
+def run_sessions(path: str, accounts: list, iterations: int, write_ratio: float, seed: int) -> list:
+    logging.disable(logging.CRITICAL)
+    os.chdir(ROOT)
+    db_connection.DB_PATH = path
+    # the first run pays for imports and schema checks, keep it out of the numbers
+    AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=TIMEOUT_S).run()
+
+    rng = random.Random(seed)
+    samples = []
+    active = [
+        Session(username, role, random.Random(seed + i), lambda *sample: samples.append(sample)).steps(iterations, write_ratio)
+        for i, (username, role) in enumerate(accounts)
+    ]
+    while active:
+        session = rng.choice(active)
+        if next(session, StopIteration) is StopIteration:
+            active.remove(session)
+    return samples
+
+def _pick_accounts(sessions: int, managers: int, employees: int, rng: random.Random) -> list:
+    accounts = []
+    for role in rng.choices(list(ROLE_MIX), weights=list(ROLE_MIX.values()), k=sessions):
+        if role == "Administrator":
+            accounts.append(("admin", role))
+        elif role == "Manager":
+            accounts.append((f"manager{rng.randrange(managers)}", role))
+        else:
+            accounts.append((f"user{rng.randrange(managers)}_{rng.randrange(employees)}", role))
+    return accounts
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def summarize(samples: list, elapsed: float) -> dict:
+    by_action = defaultdict(list)
+    errors = defaultdict(int)
+    locked = defaultdict(int)
+    for action, seconds, messages in samples:
+        by_action[action].append(seconds * 1000)
+        if messages:
+            errors[action] += 1
+            if any("database is locked" in m for m in messages):
+                locked[action] += 1
+
+    rows = []
+    for action, durations in sorted(by_action.items()):
+        durations.sort()
+        rows.append({
+            "action": action,
+            "count": len(durations),
+            "p50_ms": round(_percentile(durations, 0.50), 1),
+            "p95_ms": round(_percentile(durations, 0.95), 1),
+            "p99_ms": round(_percentile(durations, 0.99), 1),
+            "errors": errors[action],
+            "locked": locked[action],
+        })
+    total = len(samples)
+    return {
+        "actions": total,
+        "seconds": round(elapsed, 2),
+        "throughput_per_s": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+        "locked_rate": round(sum(locked.values()) / total, 4) if total else 0.0,
+        "by_action": rows,
+        "sample_errors": sorted({m for _, _, messages in samples for m in messages})[:20],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="benchmarks/load.db", help="generated fresh unless --reuse")
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--managers", type=int, default=20)
+    parser.add_argument("--employees", type=int, default=30, help="per manager")
+    parser.add_argument("--trips", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=200, help="open sessions in total")
+    parser.add_argument("--iterations", type=int, default=5, help="page actions per session after login")
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--processes", type=int, default=4, help="sessions run in parallel across this many processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSON file, default benchmarks/results/load-<time>.json")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if not (args.reuse and os.path.exists(args.db)):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+        generate(args.db, args.managers, args.employees, args.trips, seed=args.seed)
+    path = os.path.abspath(args.db)
+
+    accounts = _pick_accounts(args.sessions, args.managers, args.employees, random.Random(args.seed))
+    start = time.perf_counter()
+    if args.processes > 1:
+        shares = [accounts[i::args.processes] for i in range(args.processes)]
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            futures = [
+                pool.submit(run_sessions, path, share, args.iterations, args.write_ratio, args.seed + 1000 * i)
+                for i, share in enumerate(shares) if share
+            ]
+            samples = [sample for future in futures for sample in future.result()]
+    else:
+        samples = run_sessions(path, accounts, args.iterations, args.write_ratio, args.seed)
+    report = summarize(samples, time.perf_counter() - start)
+    report.update(sessions=args.sessions, processes=args.processes, write_ratio=args.write_ratio)
+
+    print(f"{'action':<32} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'locked':>7}")
+    for row in report["by_action"]:
+        print(f"{row['action']:<32} {row['count']:>6} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['errors']:>7} {row['locked']:>7}")
+    print(f"\n{report['actions']} actions in {report['seconds']}s: {report['throughput_per_s']}/s, "
+          f"errors {report['error_rate']:.2%}, database is locked {report['locked_rate']:.2%}")
+
+    out = args.out or f"benchmarks/results/load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"written to {out}", file=sys.stderr)
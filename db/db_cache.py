@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+import streamlit as st
+
+CACHE_SIZE = 1024
+
+### Bounded LRU cache with hit/miss counters, keys are tuples starting with a namespace ###
+class LRUCache:
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: tuple, loader):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        # load outside the lock, a concurrent miss on the same key only costs one extra query
+        value = loader()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, key: tuple):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_namespace(self, namespace: str):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+### One cache per process, shared by all sessions ###
+@st.cache_resource(show_spinner=False)
+def get_cache() -> LRUCache:
+    return LRUCache()
+
+### Read-through helper: cached(("user_ID", name), lambda: ...) ###
+def cached(key: tuple, loader):
+    return get_cache().get_or_load(key, loader)
@@ -0,0 +1,116 @@
+import os
+import time
+import sqlite3
+import queue
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+import streamlit as st
+from db import db_stats
+DB_PATH = os.environ.get("USERS_DB", "db/users.db")
+
+### Pool settings: a handful of long-lived connections is plenty for one SQLite file ###
+POOL_SIZE = 4
+BUSY_TIMEOUT_MS = 5000
+ACQUIRE_TIMEOUT_S = 30
+READ_POOL_SIZE = 8
+#after a session's own write its reads go to the primary pool for this long
+READ_YOUR_WRITES_S = 2.0
+PRIMARY_UNTIL_KEY = "read_primary_until"
+
+### Opens one connection and applies the per-connection PRAGMAs exactly once ###
+### Read-only ones open the file as a mode=ro URI and refuse writes on top of that via query_only ###
+def _open_connection(path: str, readonly: bool = False) -> sqlite3.Connection:
+    factory = db_stats.InstrumentedConnection if db_stats.ENABLED else sqlite3.Connection
+    if readonly:
+        conn = sqlite3.connect(
+            f"{Path(path).resolve().as_uri()}?mode=ro", uri=True,
+            timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, factory=factory
+        )
+        conn.execute("PRAGMA query_only = ON;")
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, factory=factory)
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+    return conn
+
+### Small thread-safe pool, connections are created lazily up to `size` ###
+class ConnectionPool:
+    def __init__(self, path: str, size: int = POOL_SIZE, readonly: bool = False):
+        self.path = path
+        self.size = size
+        self.readonly = readonly
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return _open_connection(self.path, self.readonly)
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=ACQUIRE_TIMEOUT_S)
+
+    def release(self, conn: sqlite3.Connection):
+        # never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+### One pool per process and database file, shared by all sessions ###
+@st.cache_resource(show_spinner=False)
+def get_pool(path: str, size: int = POOL_SIZE) -> ConnectionPool:
+    return ConnectionPool(path, size)
+
+### Borrow a pooled connection: `with connection() as conn: ...` ###
+### DB_PATH is looked up per call, so scripts can point the app at another file ###
+@contextmanager
+def connection(path: str | None = None):
+    pool = get_pool(path or DB_PATH)
+    conn = pool.acquire()
+    try:
+        yield conn
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+### Read-only pool next to the primary one; with WAL its readers and the writers never block each other ###
+@st.cache_resource(show_spinner=False)
+def get_read_pool(path: str, size: int = READ_POOL_SIZE) -> ConnectionPool:
+    return ConnectionPool(path, size, readonly=True)
+
+### Called after a commit: this session's next reads see the primary for READ_YOUR_WRITES_S ###
+def mark_write():
+    st.session_state[PRIMARY_UNTIL_KEY] = time.monotonic() + READ_YOUR_WRITES_S
+
+def _reads_primary() -> bool:
+    return st.session_state.get(PRIMARY_UNTIL_KEY, 0.0) > time.monotonic()
+
+### Dashboard reads: `with read_connection() as conn: ...` holds one snapshot for the whole block ###
+### primary=True (or a write of this session moments ago) reads through the read/write pool instead ###
+@contextmanager
+def read_connection(path: str | None = None, primary: bool = False):
+    if primary or _reads_primary():
+        with connection(path) as conn:
+            yield conn
+        return
+    pool = get_read_pool(path or DB_PATH)
+    conn = pool.acquire()
+    try:
+        conn.execute("BEGIN")
+        yield conn
+    finally:
+        # ends the snapshot, a reader never has anything to commit
+        pool.release(conn)
@@ -0,0 +1,23 @@
+import streamlit as st
+
+FLASH_KEY = "flash_messages"
+ICONS = {
+    "success": "✅",
+    "info": "ℹ️",
+    "warning": "⚠️",
+    "error": "❌",
+}
+
+### Session-scoped queue of messages that survive st.rerun() and st.switch_page() ###
+def flash(message: str, kind: str = "success"):
+    st.session_state.setdefault(FLASH_KEY, []).append((message, kind))
+
+### Queues the confirmation and reruns right away instead of sleeping so it can be read ###
+def flash_rerun(message: str, kind: str = "success", scope: str = "app"):
+    flash(message, kind)
+    st.rerun(scope=scope)
+
+### Shows and empties the queue, called at the top of every page (and inside fragments) ###
+def show_flashes():
+    for message, kind in st.session_state.pop(FLASH_KEY, []):
+        st.toast(message, icon=ICONS.get(kind))
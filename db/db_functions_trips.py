@@ -1,87 +1,67 @@
 import sqlite3
-import time
+from functools import partial
 import streamlit as st
-import pandas as pd
 from datetime import date
-DB_PATH = "db/users.db"
-
-### Connecting to the database trips.db ###
-def connect():
-    return sqlite3.connect(DB_PATH)
-
-def create_trip_table():
-    conn = connect()
-    conn.execute("PRAGMA foreign_keys = ON;")
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS trips (
-                        trip_ID INTEGER NOT NULL UNIQUE PRIMARY KEY AUTOINCREMENT,
-                        destination TEXT NOT NULL,
-                        start_date TEXT,
-                        end_date TEXT, 
-                        occasion TEXT
-    )
-    """)
-    conn.commit()
-    conn.close()
-
-def create_trip_users_table():
-    conn = connect()
-    conn.execute("PRAGMA foreign_keys = ON;")
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS user_trips (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        trip_ID INTEGER NOT NULL,
-                        user_ID INTEGER NOT NULL,
-                        UNIQUE (user_ID, trip_ID),
-                        FOREIGN KEY(trip_ID) REFERENCES trips(trip_ID) ON DELETE CASCADE,
-                        FOREIGN KEY(user_ID) REFERENCES users(user_ID) ON DELETE CASCADE
-    )
-    """)
-    c.execute("CREATE INDEX IF NOT EXISTS ix_user_trips_trip ON user_trips(trip_ID);")
-    c.execute("CREATE INDEX IF NOT EXISTS ix_user_trips_user ON user_trips(user_ID);")
-    conn.commit()
-    conn.close()
-
-def add_trip(destination, start_date, end_date, occasion, user_ids):
-    conn = connect()
-    conn.execute("PRAGMA foreign_keys = ON;")
-    c = conn.cursor()
-    try:
-        c.execute(
-            "INSERT INTO trips (destination, start_date, end_date, occasion) VALUES (?, ?, ?, ?)",
-            (destination, start_date, end_date, occasion)
-        )
+from db.db_connection import connection, read_connection
+from db.db_import_export import export_trips, import_trips, iso_date
+from db.db_functions_usertrips import apply_participants, update_trip_participants, find_conflicts, participant_conflicts
+from db.db_functions_users import get_users_for_current_manager, get_role_sortkey
+from db.db_flash import flash, flash_rerun, show_flashes
+from db.db_versions import cached_query
+from db.db_writer import write
+
+### Inserts a trip with its participants, returns False (after showing the error) if it was not saved ###
+def add_trip(destination, start_date, end_date, occasion, user_ids, manager_ID=None) -> bool:
+    if manager_ID is None:
+        manager_ID = st.session_state.get("user_ID", None)
+    row = (destination, iso_date(start_date), iso_date(end_date), occasion, manager_ID)
+
+    def insert(conn):
+        c = conn.cursor()
+        c.execute("INSERT INTO trips (destination, start_date, end_date, occasion, manager_ID) VALUES (?, ?, ?, ?, ?)", row)
         if user_ids:
-            trip_ID = c.lastrowid
-            user_trips_list = [(trip_ID, user_ID) for user_ID in user_ids]
-            c.executemany("INSERT OR IGNORE INTO user_trips (trip_ID, user_ID) VALUES (?, ?)", user_trips_list)
-        conn.commit()
+            apply_participants(conn, {c.lastrowid: user_ids}, new_trips=True)
+
+    try:
+        write(insert)
     except Exception as e:
+        #IntegrityError, a locked database or a write-behind timeout alike
         st.error(f"Unable to add the trip: {e}")
-    finally:
-        conn.close()
+        return False
+    return True
 
-def del_trip(deleted_tripID: int):
-    conn = connect()
-    conn.execute("PRAGMA foreign_keys = ON;")
-    c = conn.cursor()
-    try:
-        c.execute(
-            "DELETE FROM trips WHERE trip_ID = ?",
-            (deleted_tripID,)
-        )
+### Deletes a trip owned by manager_ID, returns False if there was nothing to delete ###
+def del_trip(deleted_tripID: int, manager_ID: int) -> bool:
+    def delete(conn):
+        c = conn.cursor()
         c.execute(
-            "DELETE FROM user_trips WHERE trip_ID = ?",
-            (deleted_tripID,)
+            "DELETE FROM trips WHERE trip_ID = ? AND manager_ID = ?",
+            (deleted_tripID, manager_ID)
         )
-        conn.commit()
-    except:
+        deleted = c.rowcount > 0
+        if deleted:
+            c.execute(
+                "DELETE FROM user_trips WHERE trip_ID = ?",
+                (deleted_tripID,)
+            )
+        return deleted
+
+    try:
+        return write(delete)
+    except sqlite3.Error:
         st.error("Unable to delete the trip")
-    finally:
-        conn.close()
+        return False
+
+### Conflicting trips as a small inline table ###
+def _show_conflicts(conflicts, message: str):
+    import pandas as pd
+    st.warning(message)
+    st.dataframe(
+        pd.DataFrame(conflicts, columns=["username", "trip_ID", "destination", "start_date", "end_date"]),
+        hide_index=True, use_container_width=True
+    )
 
+@st.fragment
 def create_trip_dropdown(title: str = "Create new trip"):
     with st.expander(title, expanded=False):
         with st.form("Create a trip", clear_on_submit=True):
@@ -90,17 +70,8 @@ def create_trip_dropdown(title: str = "Create new trip"):
             end_date = st.date_input("Return")
             occasion = st.text_input("Occasion")
 
-            conn = connect()
-            user_df = pd.read_sql_query("""SELECT u.user_ID, u.username FROM users u 
-                                        JOIN roles r ON u.role = r.role 
-                                        WHERE r.sortkey < 3
-                                        AND u.manager_ID = ? 
-                                        ORDER BY username""", conn, params=(int(st.session_state["user_ID"]),),
-            )
-            conn.close()
-
-
-            options = list(zip(user_df["user_ID"], user_df["username"]))
+            #the cached roster, administrators are never assigned to trips
+            options = [(u.user_ID, u.username) for u in get_users_for_current_manager() if get_role_sortkey(u.role) < 3]
             selected = st.multiselect("Assign users", options=options, format_func=lambda x: x[1])
             user_ids = [opt[0] for opt in selected]
 
@@ -109,12 +80,34 @@ def create_trip_dropdown(title: str = "Create new trip"):
         if submitted:
             if not destination:
                 st.error("Destination must not be empty.")
+            elif start_date and end_date and end_date < start_date:
+                st.error("Return must not be before departure.")
             else:
-                add_trip(destination, start_date, end_date, occasion, user_ids)
-                st.success("Trip saved!")
-                time.sleep(0.5)
-                st.rerun()
+                with connection() as conn:
+                    conflicts = find_conflicts(conn, user_ids, iso_date(start_date), iso_date(end_date))
+                if conflicts:
+                    st.session_state["pending_trip"] = {
+                        "destination": destination,
+                        "trip": (destination, start_date, end_date, occasion, user_ids),
+                        "conflicts": conflicts,
+                    }
+                elif add_trip(destination, start_date, end_date, occasion, user_ids, int(st.session_state["user_ID"])):
+                    flash_rerun("Trip saved!")
+
+        #a trip that double-books someone waits here until it is confirmed or dropped
+        pending = st.session_state.get("pending_trip")
+        if pending:
+            _show_conflicts(pending["conflicts"], f"Some participants of '{pending['destination']}' are already travelling then:")
+            col1, col2 = st.columns(2)
+            with col1:
+                #kept on failure, so the error shows next to it and saving can be retried
+                if st.button("Save anyway", key="pending_trip_save") and add_trip(*pending["trip"], int(st.session_state["user_ID"])):
+                    del st.session_state["pending_trip"]
+                    flash_rerun("Trip saved!")
+            with col2:
+                st.button("Cancel", key="pending_trip_cancel", on_click=st.session_state.pop, args=("pending_trip", None))
 
+@st.fragment
 def del_trip_dropdown(title: str = "Delete trip"):
     with st.expander(title, expanded=False):
         with st.form("Delete a trip", clear_on_submit=True):
@@ -130,117 +123,325 @@ def del_trip_dropdown(title: str = "Delete trip"):
                     except ValueError:
                         st.error("TRIP ID has to be a integer")
                     else:
-                        del_trip(deleted_tripID)
-                        st.success("Trip deleted!")
-                        time.sleep(0.5)
-                        st.rerun()
+                        if not del_trip(deleted_tripID, int(st.session_state["user_ID"])):
+                            st.error("No trip with this ID in your trips.")
+                            return
+                        flash_rerun("Trip deleted!")
+
+### Dropdown for bulk trip planning: export a date range, import a CSV/Parquet file ###
+@st.fragment
+def trip_import_export_dropdown(title: str = "Import / export trips"):
+    manager_ID = int(st.session_state["user_ID"])
+    with st.expander(title, expanded=False):
+        st.caption("Columns: destination, start_date, end_date, occasion, participants (usernames separated by ;)")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            export_start = st.date_input("From", value=None, key="trip_export_start")
+        with col2:
+            export_end = st.date_input("To", value=None, key="trip_export_end")
+        export_fmt = st.radio("Format", ["csv", "parquet"], horizontal=True, key="trip_export_fmt")
+        st.download_button(
+            "Export trips",
+            data=partial(export_trips, manager_ID, export_start, export_end, export_fmt),
+            file_name=f"trips.{export_fmt}",
+            mime="text/csv" if export_fmt == "csv" else "application/octet-stream",
+            on_click="ignore",
+        )
+
+        with st.form("import_trips_form", clear_on_submit=True):
+            upload = st.file_uploader("Trip file", type=["csv", "parquet"])
+            submitted = st.form_submit_button("Import")
+
+        if submitted:
+            if upload is None:
+                st.warning("Please choose a file.")
+                return
+            fmt = "parquet" if upload.name.lower().endswith(".parquet") else "csv"
+            report = import_trips(upload, manager_ID, fmt)
+            if report.inserted:
+                st.success(f"✅ {report.inserted} trips imported.")
+            if report.failed:
+                import pandas as pd
+                st.warning(f"{report.failed} rows were skipped.")
+                st.dataframe(
+                    pd.DataFrame(report.errors, columns=["line", "destination", "error"]),
+                    hide_index=True, use_container_width=True
+                )
+
+### Trips no manager can see: no participant had a manager when ownership was introduced, ###
+### or the owner was deleted without a manager to take them over, or is no Manager any more ###
+def get_unassigned_trips() -> list[tuple]:
+    def load():
+        with read_connection() as conn:
+            c = conn.cursor()
+            c.execute("""
+                SELECT trip_ID, destination, start_date, end_date
+                FROM trips
+                WHERE manager_ID IS NULL
+                OR manager_ID IN (SELECT user_ID FROM users WHERE role <> 'Manager')
+                ORDER BY start_date, trip_ID
+            """)
+            return tuple(c.fetchall())
+    return list(cached_query(("unassigned_trips",), ("trips", "users"), load))
+
+### Dropdown for Admin page to hand unassigned trips to a manager ###
+@st.fragment
+def unassigned_trips_dropdown_admin(title: str = "Unassigned trips"):
+    trips = get_unassigned_trips()
+    if not trips:
+        return
+
+    with st.expander(f"{title} ({len(trips)})", expanded=False):
+        with connection() as conn:
+            managers = conn.execute("SELECT user_ID, username FROM users WHERE role = 'Manager' ORDER BY username").fetchall()
+        if not managers:
+            st.info("There is no manager to assign these trips to.")
+            return
+
+        with st.form("assign_trips_form"):
+            selected = st.multiselect(
+                "Trips", options=trips,
+                format_func=lambda t: f"{t[0]} — {t[1]} ({t[2]} → {t[3]})"
+            )
+            manager = st.selectbox("Assign to", options=managers, format_func=lambda m: m[1])
+            submitted = st.form_submit_button("Assign")
+
+        if submitted:
+            if not selected:
+                st.warning("Please choose at least one trip.")
+                return
+            trip_IDs = [t[0] for t in selected]
+            placeholders = ", ".join("?" for _ in trip_IDs)
+            try:
+                write(lambda conn: conn.execute(
+                    f"UPDATE trips SET manager_ID = ? WHERE trip_ID IN ({placeholders})",
+                    (manager[0], *trip_IDs)
+                ))
+            except sqlite3.Error as e:
+                st.error(f"Unable to assign the trips: {e}")
+                return
+            flash_rerun(f"{len(trip_IDs)} trips assigned to {manager[1]}.")
+
+TRIP_PAGE_SIZES = [10, 25, 50, 100]
+
+### One page of a manager's trips via keyset pagination on (start_date, trip_ID), served by ix_trips_manager_start ###
+def load_trip_page(manager_ID: int, page_size: int, after: tuple | None = None):
+    if after is None:
+        where, params = "", ()
+    elif after[0] is None:
+        #NULL dates sort first, so everything dated comes after them
+        where, params = "AND (start_date IS NOT NULL OR trip_ID > ?)", (after[1],)
+    else:
+        where, params = "AND (start_date, trip_ID) > (?, ?)", tuple(after)
+
+    def load():
+        with read_connection() as conn:
+            c = conn.cursor()
+            c.execute(f"""
+                SELECT trip_ID, destination, start_date, end_date, occasion
+                FROM trips
+                WHERE manager_ID = ?
+                {where}
+                ORDER BY start_date, trip_ID
+                LIMIT ?
+            """, (manager_ID, *params, page_size + 1))
+            return tuple(c.fetchall())
+
+    #reruns reuse the page until trips changes
+    rows = cached_query(("trip_page", manager_ID, page_size, after), ("trips",), load)
+
+    has_more = len(rows) > page_size
+    trips = {
+        trip_ID: {
+            "trip_ID": trip_ID,
+            "destination": destination,
+            "start_date": start_date,
+            "end_date": end_date,
+            "occasion": occasion,
+        }
+        for trip_ID, destination, start_date, end_date, occasion in rows[:page_size]
+    }
+    return trips, has_more
+
+### Current rows and participants of the given trips in two queries, the roster comes from the user cache ###
+def load_trip_details(manager_ID: int, trip_IDs):
+    trip_IDs = list(trip_IDs)
+    roster = {u.user_ID: u.username for u in get_users_for_current_manager()}
+    if not trip_IDs:
+        return {}, roster
+
+    def load():
+        with read_connection() as conn:
+            c = conn.cursor()
+            placeholders = ", ".join("?" for _ in trip_IDs)
+            c.execute(f"""
+                SELECT trip_ID, destination, start_date, end_date, occasion
+                FROM trips
+                WHERE manager_ID = ? AND trip_ID IN ({placeholders})
+            """, (manager_ID, *trip_IDs))
+            details = {
+                trip_ID: {
+                    "trip_ID": trip_ID,
+                    "destination": destination,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "occasion": occasion,
+                    "participants": [],
+                }
+                for trip_ID, destination, start_date, end_date, occasion in c.fetchall()
+            }
+
+            c.execute(f"""
+                SELECT ut.trip_ID, u.user_ID, u.username, u.email, u.manager_ID
+                FROM user_trips ut
+                JOIN users u ON u.user_ID = ut.user_ID
+                WHERE ut.trip_ID IN ({placeholders})
+                ORDER BY u.username
+            """, trip_IDs)
+            for trip_ID, user_ID, username, email, user_manager_ID in c.fetchall():
+                if trip_ID in details:
+                    details[trip_ID]["participants"].append({
+                        "user_ID": user_ID,
+                        "username": username,
+                        "email": email,
+                        "manager_ID": user_manager_ID,
+                    })
+        return details
+
+    #participants change with user_trips, their names and e-mails with users
+    details = cached_query(("trip_details", manager_ID, tuple(trip_IDs)), ("trips", "user_trips", "users"), load)
+    return details, roster
+
+### Page-size control and previous/next buttons, cursors live in the session ###
+def _trip_pagination_controls(has_more: bool):
+    cursors = st.session_state["trip_page_cursors"]
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        st.caption(f"Page {len(cursors)}")
+    with col2:
+        if st.button("◀ Previous", disabled=len(cursors) <= 1, key="trip_page_prev"):
+            cursors.pop()
+            st.rerun()
+    with col3:
+        if st.button("Next ▶", disabled=not has_more, key="trip_page_next"):
+            cursors.append(st.session_state["trip_page_last"])
+            st.rerun()
+
+def _reset_trip_pages():
+    st.session_state["trip_page_cursors"] = [None]
 
 #trip table overview
 def trip_list_view():
-    conn = connect()
-    trip_df = pd.read_sql_query("""
-        SELECT trip_ID, destination, start_date, end_date, occasion
-        FROM trips
-        ORDER BY start_date
-    """, conn)
-    conn.close()
-
-    if trip_df.empty:
+    manager_ID = int(st.session_state["user_ID"])
+
+    if "trip_page_cursors" not in st.session_state:
+        _reset_trip_pages()
+    page_size = st.selectbox("Trips per page", TRIP_PAGE_SIZES, key="trip_page_size", on_change=_reset_trip_pages)
+
+    trips, has_more = load_trip_page(manager_ID, page_size, st.session_state["trip_page_cursors"][-1])
+
+    if not trips:
         st.info("No trips available.")
+        #a later page empties when its trips are deleted, here or in another session: keep the way back
+        if len(st.session_state["trip_page_cursors"]) > 1:
+            _trip_pagination_controls(False)
         return
 
-    #loop all trips
-    for _, row in trip_df.iterrows():
-        with st.expander(
-            f"{row.trip_ID} — {row.destination} ({row.start_date} → {row.end_date})",
-            expanded=False
-        ):
-            #list details
-            st.write("**Occasion:**", row.occasion)
-            st.write("**Start:**", row.start_date)
-            st.write("**End:**", row.end_date)
-
-            #load participants into table
-            conn = connect()
-            participants = pd.read_sql_query("""
-                SELECT u.username, u.email
-                FROM users u
-                JOIN user_trips ut ON ut.user_ID = u.user_ID
-                WHERE ut.trip_ID = ?
-                ORDER BY u.username
-            """, conn, params=(row.trip_ID,))
-            conn.close()
-
-            st.markdown("**Participants:**")
-            st.dataframe(participants, hide_index=True, use_container_width=True)
-
-            #edit occasion
-            with st.form(f"edit_trip_{row.trip_ID}"):
-                new_occasion = st.text_input("Edit occasion", value=row.occasion)
-                submitted = st.form_submit_button("Save changes")
-                if submitted:
-                    conn = connect()
-                    conn.execute(
-                        "UPDATE trips SET occasion = ? WHERE trip_ID = ?",
-                        (new_occasion, row.trip_ID)
-                    )
-                    conn.commit()
-                    conn.close()
-                    st.success("Occasion updated!")
-                    time.sleep(0.5)
-                    st.rerun()
-            
-            with st.form(f"edit_participants_{row.trip_ID}"):
-                st.write("Manage participants")
-
-                #load participants to edit them
-                conn = connect()
-                all_users_df = pd.read_sql_query("""SELECT u.user_ID, u.username FROM users u 
-                    WHERE u.manager_ID = ? 
-                    ORDER BY username
-                """, conn, params=(int(st.session_state["user_ID"]),),
-                )
-                conn.close()
-
-                #load current participants from db
-                conn = connect()
-                current_df = pd.read_sql_query("""
-                    SELECT u.user_ID, u.username
-                    FROM users u
-                    JOIN user_trips ut ON ut.user_ID = u.user_ID
-                    WHERE ut.trip_ID = ?
-                    AND u.manager_ID = ?
-                """, conn, params=(row.trip_ID, int(st.session_state["user_ID"]),), 
-                )
-                conn.close()
-
-                #multiselect to choose from
-                selected_users = st.multiselect(
-                    "Select participants",
-                    options=all_users_df["user_ID"].tolist(),
-                    default=current_df["user_ID"].tolist(),
-                    format_func=lambda uid: all_users_df.loc[all_users_df["user_ID"] == uid, "username"].values[0]
-                )
+    last = list(trips.values())[-1]
+    st.session_state["trip_page_last"] = (last["start_date"], last["trip_ID"])
+
+    #loop all trips of this page, every card is its own fragment
+    for trip in trips.values():
+        _trip_card(trip, manager_ID)
+
+    _trip_pagination_controls(has_more)
 
-                #submit button
-                update_participants = st.form_submit_button("Update participants")
+### One trip card: opening it or saving one of its forms reruns and re-queries only this card ###
+@st.fragment
+def _trip_card(trip: dict, manager_ID: int):
+    #a save in this card only reruns the card, so its message is shown here
+    show_flashes()
+    trip_ID = trip["trip_ID"]
+    key = f"trip_expander_{trip_ID}"
+    expander = st.expander(
+        f"{trip_ID} — {trip['destination']} ({trip['start_date']} → {trip['end_date']})",
+        expanded=False,
+        key=key,
+        on_change="rerun"
+    )
+    with expander:
+        #participants and forms are only loaded while the card is open
+        is_open = bool(st.session_state.get(key))
+        if is_open:
+            details, roster = load_trip_details(manager_ID, [trip_ID])
+            if trip_ID not in details:
+                st.info("This trip no longer exists.")
+                return
+            trip = details[trip_ID]
+
+        #list details
+        st.write("**Occasion:**", trip["occasion"])
+        st.write("**Start:**", trip["start_date"])
+        st.write("**End:**", trip["end_date"])
+
+        if not is_open:
+            return
+
+        trip_participants = trip["participants"]
+        st.markdown("**Participants:**")
+        st.dataframe(trip_participants, column_order=["username", "email"], hide_index=True, use_container_width=True)
+
+        #edit occasion, saved in the submit callback so the card reruns with the new value
+        with st.form(f"edit_trip_{trip_ID}"):
+            st.text_input("Edit occasion", value=trip["occasion"], key=f"trip_occasion_{trip_ID}")
+            st.form_submit_button("Save changes", on_click=_save_occasion, args=(trip_ID, manager_ID))
+        
+        with st.form(f"edit_participants_{trip_ID}"):
+            st.write("Manage participants")
+
+            #current participants of this manager's roster
+            current_ids = [p["user_ID"] for p in trip_participants if p["manager_ID"] == manager_ID]
+
+            #multiselect to choose from
+            st.multiselect(
+                "Select participants",
+                options=list(roster),
+                default=[uid for uid in current_ids if uid in roster],
+                format_func=lambda uid: roster[uid],
+                key=f"trip_participants_{trip_ID}"
+            )
 
-                if update_participants:
-                    conn = connect()
-                    c = conn.cursor()
+            #submit button
+            st.form_submit_button("Update participants", on_click=_save_participants, args=(trip_ID,))
 
-                    #delete old connection
-                    c.execute("DELETE FROM user_trips WHERE trip_ID = ?", (row.trip_ID,))
+        #participants that would be double-booked, nothing is saved until this is confirmed
+        conflicts = st.session_state.get(f"trip_conflicts_{trip_ID}")
+        if conflicts:
+            _show_conflicts(conflicts, "These participants are already on an overlapping trip:")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("Save anyway", key=f"trip_conflicts_save_{trip_ID}", on_click=_save_participants, args=(trip_ID, True))
+            with col2:
+                st.button("Cancel", key=f"trip_conflicts_cancel_{trip_ID}", on_click=st.session_state.pop, args=(f"trip_conflicts_{trip_ID}", None))
 
-                    #create new connection
-                    user_trips_list = [(row.trip_ID, uid) for uid in selected_users]
-                    c.executemany(
-                        "INSERT OR IGNORE INTO user_trips (trip_ID, user_ID) VALUES (?, ?)",
-                    user_trips_list
-                    )
+### Form callbacks of a trip card, they run before the card's fragment rerun ###
+def _save_occasion(trip_ID: int, manager_ID: int):
+    occasion = st.session_state[f"trip_occasion_{trip_ID}"]
+    write(lambda conn: conn.execute(
+        "UPDATE trips SET occasion = ? WHERE trip_ID = ? AND manager_ID = ?",
+        (occasion, trip_ID, manager_ID)
+    ))
+    flash("Occasion updated!")
 
-                    conn.commit()
-                    conn.close()
-                    st.success("Participants updated!")
-                    time.sleep(0.5)
-                    st.rerun()
+def _save_participants(trip_ID: int, force: bool = False):
+    selected = st.session_state[f"trip_participants_{trip_ID}"]
+    st.session_state.pop(f"trip_conflicts_{trip_ID}", None)
+    if not force:
+        conflicts = participant_conflicts(trip_ID, selected)
+        if conflicts:
+            st.session_state[f"trip_conflicts_{trip_ID}"] = conflicts
+            return
+    #only added and removed participants are written
+    added, removed = update_trip_participants(trip_ID, selected)
+    flash(f"Participants updated! (+{added} / −{removed})")
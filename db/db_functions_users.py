@@ -1,146 +1,178 @@
 import sqlite3
-import time
 import streamlit as st
-import pandas as pd
-DB_USERS = "db/users.db"
-
-### Connecting to the database users.db ###
-def connect():
-    return sqlite3.connect(DB_USERS)
-
-### Creating necessary tables for different role in main.py ###
-def create_tables():
-    conn = connect()
-    c = conn.cursor()
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        password TEXT NOT NULL,
-        email TEXT,
-        role TEXT NOT NULL,
-        manager_ID INTEGER,
-        FOREIGN KEY (role) REFERENCES roles (role)
-    )
-    """)
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS roles (
-        role TEXT PRIMARY KEY,
-        sortkey INTEGER NOT NULL
-    )
-    """)
-
-    c.executemany("""
-    INSERT OR IGNORE INTO roles (role, sortkey)
-    VALUES (?, ?)
-    """, [
-        ("Administrator", 3),
-        ("Manager", 2),
-        ("User", 1)
-    ])
-
-    conn.commit()
-    conn.close()
+from dataclasses import dataclass, replace
+from db.db_connection import connection, read_connection
+from db.db_cache import cached
+from db.db_versions import cached_query
+from db.db_passwords import hash_password, verify_password_pooled, dummy_hash
+from db.db_import_export import import_users_csv
+from db.db_flash import flash_rerun
+from db.db_writer import write
 
 ### we use user_ID of the manager, to add their user_ID to the users they create with another column manager_id, so manager only have access to these users, they've created ###
+### Keyed on the users version like the other roster lookups, so writes from any process show up ###
 def get_user_ID(username: str):
-    conn = connect()
-    c = conn.cursor()
-
-    c.execute("SELECT user_ID FROM users WHERE username = ?", (username,))
-    row = c.fetchone()
-
-    conn.close()
-
-    if row:
-        return row[0]
-    return None
+    def load():
+        with connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT user_ID FROM users WHERE username = ?", (username,))
+            row = c.fetchone()
+        return row[0] if row else None
+    return cached_query(("user_ID", username), ("users",), load)
 
 def get_manager_ID(username: str):
-    conn = connect()
-    c = conn.cursor()
-    c.execute("SELECT manager_ID FROM users WHERE username = ?", (username,))
-    row = c.fetchone()
-    conn.close()
-    return row[0] if row else None
+    def load():
+        with connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT manager_ID FROM users WHERE username = ?", (username,))
+            row = c.fetchone()
+        return row[0] if row else None
+    return cached_query(("manager_ID", username), ("users",), load)
 
 ### Adding users ###
 def add_user(username, password, email, role):
-    conn = connect()
-    c = conn.cursor()
     manager_ID = st.session_state.get("user_ID", None)
+    #hashed before the write, so the (possibly shared) writer never waits for scrypt
+    row = (username, hash_password(password), email, role, manager_ID)
     try:
-        c.execute(
-            "INSERT INTO users (username, password, email, role, manager_ID) VALUES (?, ?, ?, ?, ?)",
-            (username, password, email, role, manager_ID)
-        )
-        conn.commit()
+        write(lambda conn: conn.execute(
+            "INSERT INTO users (username, password, email, role, manager_ID) VALUES (?, ?, ?, ?, ?)", row
+        ))
         print(f"✅ User '{username}' sucessfully added!")
     except sqlite3.IntegrityError:
         print(f"User '{username}' exists already.")
-    finally:
-        conn.close()
-
-### Comparison from inputs to databank ###
-def get_user_by_credentials(username, password):
-    conn = connect()
-    c = conn.cursor()
-    c.execute(
-        "SELECT username, role FROM users WHERE username = ? AND password = ?",
-        (username, password)
-    )
-    user = c.fetchone()
-    conn.close()
-    return user
+
+### Everything the pages need to know about the logged in user, built once at login ###
+@dataclass(frozen=True, slots=True)
+class Principal:
+    user_ID: int
+    username: str
+    role: str
+    sortkey: int
+    manager_ID: int | None
+
+### Puts the principal and the flat keys the pages read into the session ###
+def store_principal(principal: Principal):
+    st.session_state["principal"] = principal
+    st.session_state["user_ID"] = principal.user_ID
+    st.session_state["username"] = principal.username
+    st.session_state["role"] = principal.role
+    st.session_state["role_sortkey"] = principal.sortkey
+
+### Comparison from inputs to databank, one lookup on the unique username index ###
+def get_user_by_credentials(username, password) -> Principal | None:
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT u.user_ID, u.username, u.role, r.sortkey, u.manager_ID, u.password
+            FROM users u
+            JOIN roles r ON r.role = u.role
+            WHERE u.username = ?
+        """, (username,))
+        row = c.fetchone()
+
+    if not row:
+        verify_password_pooled(password, dummy_hash())
+        return None
+
+    stored = row[5]
+    matches, needs_rehash = verify_password_pooled(password, stored)
+    if not matches:
+        return None
+
+    #plaintext or outdated cost parameters: store a fresh hash now that we know the password
+    if needs_rehash:
+        with connection() as conn:
+            conn.execute(
+                "UPDATE users SET password = ? WHERE user_ID = ? AND password = ?",
+                (hash_password(password), row[0], stored)
+            )
+            conn.commit()
+    return Principal(*row[:5])
+
+### The roles table is static, so it is read once per process ###
+def _roles() -> dict:
+    def load():
+        with connection() as conn:
+            return dict(conn.execute("SELECT role, sortkey FROM roles").fetchall())
+    return cached(("roles",), load)
 
 ### Assign sortkey to roles for user management ###
 def get_role_sortkey(role):
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-    c.execute('SELECT sortkey FROM roles WHERE role = ?', (role,))
-    data = c.fetchone()[0]
-    conn.close()
-    return data
+    return _roles().get(role)
 
 ### List of all users under own role_sortkey ###
 def list_roles_editable():
     current_sortkey = st.session_state["role_sortkey"]
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-
-    c.execute("""
-        SELECT role, sortkey
-        FROM roles
-        WHERE sortkey < ?
-        ORDER BY sortkey DESC
-    """, (current_sortkey,))
+    return sorted(
+        [(role, sortkey) for role, sortkey in _roles().items() if sortkey < current_sortkey],
+        key=lambda r: r[1], reverse=True
+    )
 
-    roles = c.fetchall()
-    conn.close()
-    return roles
+### One row of a roster or subtree listing, depth counts the levels below the manager it was loaded for ###
+@dataclass(frozen=True, slots=True)
+class UserRow:
+    user_ID: int
+    username: str
+    email: str | None
+    role: str
+    depth: int = 1
 
 ### returns all users which the manager has created ###
-def get_users_for_current_manager():
+def get_users_for_current_manager() -> list[UserRow]:
     if "user_ID" not in st.session_state:
         return []
 
     manager_id = st.session_state["user_ID"]
 
-    conn = connect()
-    c = conn.cursor()
-    c.execute("""
-        SELECT user_ID, username, email, role
-        FROM users
-        WHERE manager_ID = ?
-        ORDER BY username
-    """, (manager_id,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    def load():
+        with connection() as conn:
+            c = conn.cursor()
+            c.execute("""
+                SELECT user_ID, username, email, role
+                FROM users
+                WHERE manager_ID = ?
+                ORDER BY username
+            """, (manager_id,))
+            return tuple(UserRow(*row) for row in c.fetchall())
+    #keyed on the users version, so rosters changed by any session or process are reloaded
+    return list(cached_query(("manager_users", manager_id), ("users",), load))
+
+### Everyone below manager_ID at any depth, one range scan on the closure table's primary key ###
+def get_subtree_users(manager_ID: int, max_sortkey: int | None = None, max_depth: int | None = None) -> list[UserRow]:
+    def load():
+        where, params = "", [manager_ID]
+        if max_depth is not None:
+            where += " AND h.depth <= ?"
+            params.append(max_depth)
+        if max_sortkey is not None:
+            where += " AND r.sortkey < ?"
+            params.append(max_sortkey)
+        with connection() as conn:
+            c = conn.cursor()
+            c.execute(f"""
+                SELECT u.user_ID, u.username, u.email, u.role, h.depth
+                FROM user_hierarchy h
+                JOIN users u ON u.user_ID = h.descendant_ID
+                JOIN roles r ON r.role = u.role
+                WHERE h.ancestor_ID = ? AND h.depth > 0{where}
+                ORDER BY r.sortkey DESC, h.depth, u.username
+            """, params)
+            return tuple(UserRow(*row) for row in c.fetchall())
+    #the closure table only changes together with users
+    return list(cached_query(("subtree", manager_ID, max_sortkey, max_depth), ("users",), load))
+
+### True if user_ID reports to manager_ID, directly or through sub-managers ###
+def is_below(manager_ID: int, user_ID: int) -> bool:
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT 1 FROM user_hierarchy WHERE ancestor_ID = ? AND descendant_ID = ? AND depth > 0",
+            (manager_ID, user_ID)
+        ).fetchone()
+    return row is not None
 
 ### Dropdown for manager page to register someone ###
+@st.fragment
 def register_user_dropdown(title: str = "Register new user"):
     if "role_sortkey" not in st.session_state:
         st.warning("You're not authorized to add new users")
@@ -175,15 +207,14 @@ def register_user_dropdown(title: str = "Register new user"):
 
             try:
                 add_user(username, password, email, role)
-                st.success(f"User **{username}** was registered")
-                time.sleep(2)
-                st.rerun()
+                flash_rerun(f"User **{username}** was registered")
             except sqlite3.IntegrityError as e:
                 st.error(f"Registration failed (maybe already exists): {e}")
             except Exception as e:
                 st.error(f"Unexpected Error: {e}")
 
 ### Dropdown for admin page to register someone ###
+@st.fragment
 def register_user_dropdown_admin(title: str = "Register new user"):
     if "role_sortkey" not in st.session_state:
         st.warning("You're not authorized to add new users")
@@ -219,35 +250,78 @@ def register_user_dropdown_admin(title: str = "Register new user"):
 
             try:
                 add_user(username, password, email, role)
-                st.success(f"User **{username}** was registered")
-                time.sleep(2)
-                st.rerun()
+                flash_rerun(f"User **{username}** was registered")
             except sqlite3.IntegrityError as e:
                 st.error(f"Registration failed (maybe already exists): {e}")
             except Exception as e:
                 st.error(f"Unexpected Error: {e}")
 
 
+### Shows the outcome of a CSV import including the rows that were skipped ###
+def _show_import_report(report):
+    import pandas as pd
+    if report.inserted:
+        st.success(f"✅ {report.inserted} users imported.")
+    if report.failed:
+        st.warning(f"{report.failed} rows were skipped.")
+        st.dataframe(
+            pd.DataFrame(report.errors, columns=["line", "username", "error"]),
+            hide_index=True, use_container_width=True
+        )
+
+### Dropdown for manager page to import users from a CSV file ###
+@st.fragment
+def import_users_dropdown(title: str = "Import users from CSV"):
+    if "role_sortkey" not in st.session_state:
+        st.warning("You're not authorized to add new users")
+        return
+
+    role_names = [r[0] for r in list_roles_editable()]
+
+    with st.expander(title, expanded=False):
+        st.caption("Columns: username, password, email, role; every password is hashed, so expect about a minute per thousand rows")
+        with st.form("import_users_form", clear_on_submit=True):
+            upload = st.file_uploader("CSV file", type=["csv"])
+            submitted = st.form_submit_button("Import")
+
+        if submitted:
+            if upload is None:
+                st.warning("Please choose a CSV file.")
+                return
+            report = import_users_csv(upload, role_names, manager_ID=st.session_state["user_ID"])
+            _show_import_report(report)
+
+### Dropdown for admin page to import users from a CSV file ###
+@st.fragment
+def import_users_dropdown_admin(title: str = "Import users from CSV"):
+    if "role_sortkey" not in st.session_state:
+        st.warning("You're not authorized to add new users")
+        return
+
+    role_names = [r[0] for r in list_roles_editable()]
+
+    with st.expander(title, expanded=False):
+        st.caption("Columns: username, password, email, role, manager_ID (optional); every password is hashed, so expect about a minute per thousand rows")
+        with st.form("import_users_form", clear_on_submit=True):
+            upload = st.file_uploader("CSV file", type=["csv"])
+            submitted = st.form_submit_button("Import")
+
+        if submitted:
+            if upload is None:
+                st.warning("Please choose a CSV file.")
+                return
+            report = import_users_csv(upload, role_names, allow_manager_column=True)
+            _show_import_report(report)
+
 ### Dropdown for manager page to delete someone ###
+@st.fragment
 def del_user_dropdown(title: str = "Delete user"):
     if "role_sortkey" not in st.session_state:
         st.warning("You're not authorized to delete users.")
         return
 
-    current_sortkey = st.session_state["role_sortkey"]
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-
-    c.execute("""
-        SELECT u.username, u.role
-        FROM users u
-        JOIN roles r ON u.role = r.role
-        WHERE r.sortkey < ? 
-        AND u.manager_ID = ?
-        ORDER BY r.sortkey DESC
-    """, (current_sortkey, st.session_state["user_ID"]))
-    users = c.fetchall()
-    conn.close()
+    #the whole subtree, sub-managers' teams included
+    users = [(u.username, u.role) for u in get_subtree_users(st.session_state["user_ID"], st.session_state["role_sortkey"])]
 
     if not users:
         st.info("No deletable users available.")
@@ -259,34 +333,33 @@ def del_user_dropdown(title: str = "Delete user"):
 
         if st.button("Delete user"):
             username = selected_user.split("·")[0].strip()
-            conn = sqlite3.connect(DB_USERS)
-            c = conn.cursor()
-            c.execute("DELETE FROM users WHERE username = ?", (username,))
-            conn.commit()
-            conn.close()
-            st.success(f"✅ User '{username}' has been deleted.")
-            time.sleep(2)
-            st.rerun()
+            try:
+                with connection() as conn:
+                    conn.execute("DELETE FROM users WHERE username = ?", (username,))
+                    conn.commit()
+            except sqlite3.IntegrityError as e:
+                st.error(f"Unable to delete '{username}': {e}")
+                return
+            flash_rerun(f"User '{username}' has been deleted.")
 
 ### Dropdown for Admin page to delete someone ###
+@st.fragment
 def del_user_dropdown_admin(title: str = "Delete user"):
     if "role_sortkey" not in st.session_state:
         st.warning("You're not authorized to delete users.")
         return
 
     current_sortkey = st.session_state["role_sortkey"]
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-
-    c.execute("""
-        SELECT u.username, u.role
-        FROM users u
-        JOIN roles r ON u.role = r.role
-        WHERE r.sortkey < ? 
-        ORDER BY r.sortkey DESC
-    """, (current_sortkey,))
-    users = c.fetchall()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT u.username, u.role
+            FROM users u
+            JOIN roles r ON u.role = r.role
+            WHERE r.sortkey < ? 
+            ORDER BY r.sortkey DESC
+        """, (current_sortkey,))
+        users = c.fetchall()
 
     if not users:
         st.info("No deletable users available.")
@@ -298,36 +371,24 @@ def del_user_dropdown_admin(title: str = "Delete user"):
 
         if st.button("Delete user"):
             username = selected_user.split("·")[0].strip()
-            conn = sqlite3.connect(DB_USERS)
-            c = conn.cursor()
-            c.execute("DELETE FROM users WHERE username = ?", (username,))
-            conn.commit()
-            conn.close()
-            st.success(f"✅ User '{username}' has been deleted.")
-            time.sleep(2)
-            st.rerun()
+            try:
+                with connection() as conn:
+                    conn.execute("DELETE FROM users WHERE username = ?", (username,))
+                    conn.commit()
+            except sqlite3.IntegrityError as e:
+                st.error(f"Unable to delete '{username}': {e}")
+                return
+            flash_rerun(f"User '{username}' has been deleted.")
 
 ### Dropdown for manager page to edit existing person ###
+@st.fragment
 def edit_user_dropdown(title: str = "Edit user"):
     if "role_sortkey" not in st.session_state:
         st.warning("You're not authorized to edit users.")
         return
 
-    current_sortkey = st.session_state["role_sortkey"]
-
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-
-    c.execute("""
-        SELECT u.username, u.email, u.password, u.role
-        FROM users u
-        JOIN roles r ON u.role = r.role
-        WHERE r.sortkey < ? 
-        AND u.manager_ID = ?
-        ORDER BY r.sortkey DESC
-    """, (current_sortkey, st.session_state["user_ID"]))
-    users = c.fetchall()
-    conn.close()
+    #the whole subtree, sub-managers' teams included
+    users = [(u.username, u.email, u.role) for u in get_subtree_users(st.session_state["user_ID"], st.session_state["role_sortkey"])]
 
     if not users:
         st.info("No editable users available.")
@@ -337,17 +398,16 @@ def edit_user_dropdown(title: str = "Edit user"):
         user_list = [u[0] for u in users]
         selected_user = st.selectbox("Select user to edit", user_list)
 
-        conn = sqlite3.connect(DB_USERS)
-        c = conn.cursor()
-        c.execute("SELECT username, password, email, role FROM users WHERE username = ?", (selected_user,))
-        user_data = c.fetchone()
-        conn.close()
+        with connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT username, email, role FROM users WHERE username = ?", (selected_user,))
+            user_data = c.fetchone()
 
         if not user_data:
             st.warning("User not found.")
             return
 
-        username, password, email, role = user_data
+        username, email, role = user_data
 
         with st.form("edit_user_form"):
             col1, col2 = st.columns(2)
@@ -355,27 +415,35 @@ def edit_user_dropdown(title: str = "Edit user"):
                 new_username = st.text_input("Username", value=username)
                 new_email = st.text_input("E-Mail", value=email)
             with col2:
-                new_password = st.text_input("Password", value=password, type="password")
-                new_role = st.text_input("Role", value=role)  
+                new_password = st.text_input("Password", type="password", placeholder="Leave empty to keep the current one")
+                role_names = [r[0] for r in list_roles_editable()]
+                new_role = st.selectbox("Role", role_names, index=role_names.index(role) if role in role_names else 0)
 
             submitted = st.form_submit_button("Save changes")
 
         if submitted:
-            conn = sqlite3.connect(DB_USERS)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE users
-                SET username = ?, password = ?, email = ?, role = ?
-                WHERE username = ?
-            """, (new_username, new_password, new_email, new_role, username))
-            conn.commit()
-            conn.close()
+            try:
+                with connection() as conn:
+                    conn.execute("""
+                        UPDATE users
+                        SET username = ?, email = ?, role = ?
+                        WHERE username = ?
+                    """, (new_username, new_email, new_role, username))
+                    if new_password:
+                        conn.execute(
+                            "UPDATE users SET password = ? WHERE username = ?",
+                            (hash_password(new_password), new_username)
+                        )
+                    conn.commit()
+            except sqlite3.IntegrityError as e:
+                #a username that is taken already
+                st.error(f"Update failed: {e}")
+                return
 
-            st.success(f"✅ User '{username}' updated successfully.")
-            time.sleep (2)
-            st.rerun()
+            flash_rerun(f"User '{username}' updated successfully.")
 
 ### Dropdown for Admin page to edit existing person ###
+@st.fragment
 def edit_user_dropdown_admin(title: str = "Edit user"):
     if "role_sortkey" not in st.session_state:
         st.warning("You're not authorized to edit users.")
@@ -383,18 +451,16 @@ def edit_user_dropdown_admin(title: str = "Edit user"):
 
     current_sortkey = st.session_state["role_sortkey"]
 
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-
-    c.execute("""
-        SELECT u.username, u.email, u.password, u.role, u.manager_ID
-        FROM users u
-        JOIN roles r ON u.role = r.role
-        WHERE r.sortkey < ?
-        ORDER BY r.sortkey DESC
-    """, (current_sortkey,))
-    users = c.fetchall()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT u.username, u.email, u.role, u.manager_ID
+            FROM users u
+            JOIN roles r ON u.role = r.role
+            WHERE r.sortkey < ?
+            ORDER BY r.sortkey DESC
+        """, (current_sortkey,))
+        users = c.fetchall()
 
     if not users:
         st.info("No editable users available.")
@@ -404,22 +470,20 @@ def edit_user_dropdown_admin(title: str = "Edit user"):
         user_list = [u[0] for u in users]
         selected_user = st.selectbox("Select user to edit", user_list)
 
-        conn = sqlite3.connect(DB_USERS)
-        c = conn.cursor()
-
-        c.execute("""
-            SELECT username, password, email, role, manager_ID
-            FROM users
-            WHERE username = ?
-        """, (selected_user,))
-        user_data = c.fetchone()
-        conn.close()
+        with connection() as conn:
+            c = conn.cursor()
+            c.execute("""
+                SELECT username, email, role, manager_ID
+                FROM users
+                WHERE username = ?
+            """, (selected_user,))
+            user_data = c.fetchone()
 
         if not user_data:
             st.warning("User not found.")
             return
 
-        username, password, email, role, manager_ID = user_data
+        username, email, role, manager_ID = user_data
 
         with st.form("edit_user_form"):
             col1, col2 = st.columns(2)
@@ -428,30 +492,44 @@ def edit_user_dropdown_admin(title: str = "Edit user"):
                 new_email      = st.text_input("E-Mail", value=email)
                 new_manager_ID = st.text_input("Manager ID", value=str(manager_ID))
             with col2:
-                new_password = st.text_input("Password", value=password, type="password")
-                new_role     = st.text_input("Role", value=role)
+                new_password = st.text_input("Password", type="password", placeholder="Leave empty to keep the current one")
+                role_names   = [r[0] for r in list_roles_editable()]
+                new_role     = st.selectbox("Role", role_names, index=role_names.index(role) if role in role_names else 0)
 
             submitted = st.form_submit_button("Save changes")
 
         if submitted:
-            conn = sqlite3.connect(DB_USERS)
-            c = conn.cursor()
-
-            c.execute("""
-                UPDATE users
-                SET username = ?, password = ?, email = ?, role = ?, manager_ID = ?
-                WHERE username = ?
-            """, (
-                new_username, new_password, new_email,
-                new_role, new_manager_ID, username
-            ))
-
-            conn.commit()
-            conn.close()
+            new_manager_ID = new_manager_ID.strip()
+            if new_manager_ID in ("", "None"):
+                new_manager_ID = None
+            else:
+                try:
+                    new_manager_ID = int(new_manager_ID)
+                except ValueError:
+                    st.error("Manager ID has to be an integer")
+                    return
+            try:
+                with connection() as conn:
+                    conn.execute("""
+                        UPDATE users
+                        SET username = ?, email = ?, role = ?, manager_ID = ?
+                        WHERE username = ?
+                    """, (
+                        new_username, new_email,
+                        new_role, new_manager_ID, username
+                    ))
+                    if new_password:
+                        conn.execute(
+                            "UPDATE users SET password = ? WHERE username = ?",
+                            (hash_password(new_password), new_username)
+                        )
+                    conn.commit()
+            except sqlite3.IntegrityError as e:
+                #the hierarchy trigger refuses to put a manager below their own team
+                st.error(f"Update failed: {e}")
+                return
 
-            st.success(f"✅ User '{username}' updated successfully.")
-            time.sleep(1.5)
-            st.rerun()
+            flash_rerun(f"User '{username}' updated successfully.")
 
 ### Dropdown for main page to register as manager ###
 def register_main(title: str = "Register as manager"):
@@ -478,29 +556,21 @@ def register_main(title: str = "Register as manager"):
             role = "Manager"
 
             try:
-                conn = sqlite3.connect(DB_USERS)
-                c = conn.cursor()
-
-                c.execute(
-                    "INSERT INTO users (username, password, email, role) VALUES (?, ?, ?, ?)",
-                    (username, password, email, role)
-                )
-                conn.commit()
-
-                c.execute("SELECT user_ID FROM users WHERE username = ?", (username,))
-                new_user_id = c.fetchone()[0]
-
-                c.execute(
-                    "UPDATE users SET manager_ID = ? WHERE user_ID = ?",
-                    (new_user_id, new_user_id)
-                )
-                conn.commit()
-
-                conn.close()
-
-                st.success(f"✅ Manager '{username}' was successfully added. You can now log in.")
-                time.sleep(2)
-                st.rerun()
+                with connection() as conn:
+                    c = conn.cursor()
+                    c.execute(
+                        "INSERT INTO users (username, password, email, role) VALUES (?, ?, ?, ?)",
+                        (username, hash_password(password), email, role)
+                    )
+                    new_user_id = c.lastrowid
+
+                    c.execute(
+                        "UPDATE users SET manager_ID = ? WHERE user_ID = ?",
+                        (new_user_id, new_user_id)
+                    )
+                    conn.commit()
+
+                flash_rerun(f"Manager '{username}' was successfully added. You can now log in.")
 
             except sqlite3.IntegrityError:
                 st.error("⚠️ Manager already exists.")
@@ -508,6 +578,7 @@ def register_main(title: str = "Register as manager"):
                 st.error(f"Unexpected error: {e}")
 
 ### Input window to change user data in users.db ###
+@st.fragment
 def edit_own_profile(title: str = "My profile"):
     if "username" not in st.session_state:
         st.warning("Log in first.")
@@ -515,16 +586,15 @@ def edit_own_profile(title: str = "My profile"):
 
     current_user = st.session_state["username"]
 
-    conn = connect()
-    c = conn.cursor()
-    c.execute("SELECT username, email, password, role FROM users WHERE username = ?", (current_user,))
-    row = c.fetchone()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT username, email, role FROM users WHERE username = ?", (current_user,))
+        row = c.fetchone()
     if not row:
-        conn.close()
         st.error("User not found.")
         return
 
-    username, email, stored_pw, role = row
+    username, email, role = row
 
     st.subheader(title)
     st.caption(f"Role: **{role}** (is not editable)")
@@ -540,54 +610,150 @@ def edit_own_profile(title: str = "My profile"):
         submitted = st.form_submit_button("Safe changes")
 
     if not submitted:
-        conn.close()
         return
 
     if pw1 or pw2:
         if pw1 != pw2:
-            conn.close()
             st.error("Passwörter stimmen nicht überein.")
             return
-        new_password = pw1
-    else:
-        new_password = stored_pw 
 
-    try:
-        c.execute("""
+    new_hash = hash_password(pw1) if pw1 else None
+
+    def save(conn):
+        conn.execute("""
             UPDATE users
-               SET username = ?, email = ?, password = ?
+               SET username = ?, email = ?
              WHERE username = ?
-        """, (new_username, new_email, new_password, username))
-        conn.commit()
+        """, (new_username, new_email, username))
+        if new_hash:
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (new_hash, new_username))
+
+    try:
+        write(save)
     except sqlite3.IntegrityError:
-        conn.close()
         st.error("User exists already.")
         return
-    finally:
-        conn.close()
 
     if new_username != username:
-        st.session_state["username"] = new_username
-
-    st.success("Profile has been updated")
-    st.rerun()
-
-### Creates table for admin dashboard to see all registered managers/users ###
-def get_users_under_me() -> pd.DataFrame | None:
+        principal = st.session_state.get("principal")
+        if principal is not None:
+            store_principal(replace(principal, username=new_username))
+        else:
+            st.session_state["username"] = new_username
+
+    flash_rerun("Profile has been updated")
+
+USER_PAGE_SIZES = [25, 50, 100]
+### Sortable columns of the admin user table; NULLs are folded so the keyset comparison never sees them ###
+USER_SORT_COLUMNS = {
+    "username": "u.username",
+    "email": "coalesce(u.email, '')",
+    "role": "u.role",
+    "manager_ID": "coalesce(u.manager_ID, 0)",
+}
+
+def _like_prefix(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+### One page of users below max_sortkey, filtered and sorted in SQL, via keyset pagination on (sort column, user_ID) ###
+### text matches the start of username or e-mail (case-insensitive, served by the NOCASE indexes) ###
+def search_users(max_sortkey: int, text: str = "", role: str | None = None, manager_ID: int | None = None,
+                 sort: str = "username", descending: bool = False, page_size: int = 50, after: tuple | None = None):
+    roles = [r for r, sortkey in _roles().items() if sortkey < max_sortkey and (role is None or r == role)]
+    if not roles:
+        return [], False
+    sort_expr = USER_SORT_COLUMNS[sort]
+    direction = "DESC" if descending else "ASC"
+
+    where = [f"u.role IN ({', '.join('?' for _ in roles)})"]
+    params = list(roles)
+    text = text.strip()
+    if text:
+        where.append("(u.username LIKE ? ESCAPE '\\' OR u.email LIKE ? ESCAPE '\\')")
+        params += [_like_prefix(text)] * 2
+    if manager_ID is not None:
+        where.append("u.manager_ID = ?")
+        params.append(manager_ID)
+    if after is not None:
+        # spelled out instead of a row value, which SQLite cannot range-scan on an expression index
+        op = "<" if descending else ">"
+        where.append(f"{sort_expr} {op}= ? AND ({sort_expr} {op} ? OR u.user_ID {op} ?)")
+        params += [after[0], after[0], after[1]]
+
+    def load():
+        with read_connection() as conn:
+            c = conn.cursor()
+            c.execute(f"""
+                SELECT u.user_ID, u.username, u.email, u.role, u.manager_ID, {sort_expr}
+                FROM users u
+                WHERE {" AND ".join(where)}
+                ORDER BY {sort_expr} {direction}, u.user_ID {direction}
+                LIMIT ?
+            """, (*params, page_size + 1))
+            return tuple(c.fetchall())
+
+    key = ("user_search", max_sortkey, text, role, manager_ID, sort, descending, page_size, after)
+    rows = cached_query(key, ("users",), load)
+    return list(rows[:page_size]), len(rows) > page_size
+
+def _reset_user_pages():
+    st.session_state["user_page_cursors"] = [None]
+
+### Admin user table: search, filters, sort and previous/next, only the visible page is loaded ###
+@st.fragment
+def user_table_view():
     if "role_sortkey" not in st.session_state:
-        return None
+        st.warning("Fehlender Kontext: 'role_sortkey' ist nicht im session_state.")
+        return
+    if "user_page_cursors" not in st.session_state:
+        _reset_user_pages()
+
+    role_names = [r[0] for r in list_roles_editable()]
+    col1, col2, col3 = st.columns([3, 2, 2])
+    with col1:
+        text = st.text_input("Search username or e-mail", key="user_search", on_change=_reset_user_pages)
+    with col2:
+        role = st.selectbox("Role", ["All"] + role_names, key="user_role_filter", on_change=_reset_user_pages)
+    with col3:
+        manager = st.text_input("Manager ID", key="user_manager_filter", on_change=_reset_user_pages)
+    col1, col2, col3 = st.columns([3, 2, 2])
+    with col1:
+        sort = st.selectbox("Sort by", list(USER_SORT_COLUMNS), key="user_sort", on_change=_reset_user_pages)
+    with col2:
+        descending = st.toggle("Descending", key="user_sort_desc", on_change=_reset_user_pages)
+    with col3:
+        page_size = st.selectbox("Users per page", USER_PAGE_SIZES, key="user_page_size", on_change=_reset_user_pages)
+
+    manager_ID = None
+    if manager.strip():
+        try:
+            manager_ID = int(manager)
+        except ValueError:
+            st.error("Manager ID has to be an integer")
+            return
 
-    current = st.session_state["role_sortkey"]
-    conn = sqlite3.connect(DB_USERS)
-    c = conn.cursor()
-    c.execute("""
-        SELECT u.username, u.email, u.role, r.sortkey, u.manager_ID
-        FROM users u
-        JOIN roles r ON u.role = r.role
-        WHERE r.sortkey < ?
-        ORDER BY r.sortkey DESC, u.username
-    """, (current,))
-    rows = c.fetchall()
-    conn.close()
-
-    return pd.DataFrame(rows, columns=["username", "email", "role", "sortkey", "manager_ID"])
\ No newline at end of file
+    cursors = st.session_state["user_page_cursors"]
+    rows, has_more = search_users(
+        st.session_state["role_sortkey"], text, None if role == "All" else role, manager_ID,
+        sort, descending, page_size, cursors[-1]
+    )
+    if not rows:
+        st.info("Keine Benutzer unter deiner Rolle.")
+    else:
+        import pandas as pd
+        st.dataframe(
+            pd.DataFrame([row[:5] for row in rows], columns=["user_ID", "username", "email", "role", "manager_ID"]),
+            hide_index=True, use_container_width=True
+        )
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        st.caption(f"Page {len(cursors)}")
+    #the cursors change in the callbacks, before the table reruns
+    with col2:
+        st.button("◀ Previous", disabled=len(cursors) <= 1, key="user_page_prev", on_click=cursors.pop)
+    with col3:
+        st.button(
+            "Next ▶", disabled=not has_more, key="user_page_next",
+            on_click=cursors.append, args=((rows[-1][5], rows[-1][0]) if rows else None,)
+        )
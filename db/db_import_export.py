@@ -0,0 +1,284 @@
+import io
+import csv
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from db.db_connection import connection
+from db.db_passwords import hash_passwords, is_hashed, is_valid_hash
+from db.db_functions_usertrips import apply_participants
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+### Result of a bulk import, only the first MAX_REPORTED_ERRORS errors are kept ###
+@dataclass(slots=True)
+class ImportReport:
+    inserted: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def error(self, line: int, key, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, key, message))
+
+### Wraps an uploaded (binary) file so csv can read it row by row, without closing it afterwards ###
+@contextmanager
+def _text_stream(file):
+    if isinstance(file, io.TextIOBase):
+        yield file
+        return
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield stream
+    finally:
+        stream.detach()
+
+def _chunks(rows, size: int = CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+### Validated (line, values) tuples for users; header: username,password,email,role[,manager_ID] ###
+def _parse_user_rows(reader, report: ImportReport, allowed_roles, default_manager_ID, allow_manager_column: bool):
+    for line, row in enumerate(reader, start=2):
+        username = (row.get("username") or "").strip()
+        password = row.get("password") or ""
+        email = (row.get("email") or "").strip() or None
+        role = (row.get("role") or "").strip()
+
+        if not username:
+            report.error(line, username, "username is empty")
+            continue
+        if not password:
+            report.error(line, username, "password is empty")
+            continue
+        if is_hashed(password) and not is_valid_hash(password):
+            report.error(line, username, "password looks like a scrypt hash but is malformed")
+            continue
+        if role not in allowed_roles:
+            report.error(line, username, f"role '{role}' is not allowed")
+            continue
+
+        manager_ID = default_manager_ID
+        if allow_manager_column and (row.get("manager_ID") or "").strip():
+            try:
+                manager_ID = int(row["manager_ID"])
+            except ValueError:
+                report.error(line, username, "manager_ID has to be an integer")
+                continue
+
+        yield line, (username, password, email, role, manager_ID)
+
+### Inserts one chunk in one transaction; duplicates are reported per row ###
+### A pooled connection is only held for the lookup and the insert, never while the chunk is hashed ###
+def _insert_user_chunk(chunk, report: ImportReport):
+    seen = set()
+    unique = []
+    for line, values in chunk:
+        if values[0] in seen:
+            report.error(line, values[0], "duplicate username in file")
+        else:
+            seen.add(values[0])
+            unique.append((line, values))
+
+    placeholders = ", ".join("?" for _ in unique)
+    existing = set()
+    if unique:
+        with connection() as conn:
+            existing = {
+                row[0] for row in conn.execute(
+                    f"SELECT username FROM users WHERE username IN ({placeholders})",
+                    [values[0] for _, values in unique]
+                )
+            }
+
+    rows = []
+    for line, values in unique:
+        if values[0] in existing:
+            report.error(line, values[0], "username exists already")
+        else:
+            rows.append((line, values))
+
+    #only plaintext passwords go through scrypt, on the import pool rather than the one logins use
+    passwords = [values[1] for _, values in rows]
+    plain = [i for i, password in enumerate(passwords) if not is_hashed(password)]
+    for i, password_hash in zip(plain, hash_passwords(passwords[i] for i in plain)):
+        passwords[i] = password_hash
+    hashed = passwords
+    params = [
+        (username, password_hash, email, role, manager_ID)
+        for (_, (username, _, email, role, manager_ID)), password_hash in zip(rows, hashed)
+    ]
+    if not params:
+        return
+    with connection() as conn:
+        try:
+            conn.executemany(
+                "INSERT INTO users (username, password, email, role, manager_ID) VALUES (?, ?, ?, ?, ?)",
+                params
+            )
+            conn.commit()
+            report.inserted += len(params)
+        except sqlite3.IntegrityError:
+            # someone else inserted one of these names meanwhile: retry row by row
+            conn.rollback()
+            for (line, values), row_params in zip(rows, params):
+                try:
+                    conn.execute(
+                        "INSERT INTO users (username, password, email, role, manager_ID) VALUES (?, ?, ?, ?, ?)",
+                        row_params
+                    )
+                    report.inserted += 1
+                except sqlite3.IntegrityError as e:
+                    report.error(line, values[0], str(e))
+            conn.commit()
+
+### Streams a users CSV into the database in CHUNK_SIZE transactions ###
+def import_users_csv(file, allowed_roles, manager_ID=None, allow_manager_column: bool = False) -> ImportReport:
+    report = ImportReport()
+    with _text_stream(file) as stream:
+        reader = csv.DictReader(stream)
+        missing = {"username", "password", "role"} - set(reader.fieldnames or [])
+        if missing:
+            report.error(1, None, f"missing columns: {', '.join(sorted(missing))}")
+            return report
+
+        rows = _parse_user_rows(reader, report, set(allowed_roles), manager_ID, allow_manager_column)
+        for chunk in _chunks(rows):
+            _insert_user_chunk(chunk, report)
+
+    return report
+
+TRIP_COLUMNS = ["trip_ID", "destination", "start_date", "end_date", "occasion", "participants"]
+
+### Trips of one manager overlapping [start, end], participants as ';'-separated usernames ###
+### Only given bounds end up in the SQL, so `start_date <= end` is a range on ix_trips_manager_start ###
+def _trip_export_rows(conn, manager_ID: int, start=None, end=None):
+    where, params = "", [manager_ID]
+    if end is not None:
+        where += " AND t.start_date <= ?"
+        params.append(end)
+    if start is not None:
+        where += " AND t.end_date >= ?"
+        params.append(start)
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT t.trip_ID, t.destination, t.start_date, t.end_date, t.occasion,
+               (SELECT group_concat(u.username, ';')
+                FROM user_trips ut JOIN users u ON u.user_ID = ut.user_ID
+                WHERE ut.trip_ID = t.trip_ID)
+        FROM trips t
+        WHERE t.manager_ID = ?
+        {where}
+        ORDER BY t.start_date, t.trip_ID
+    """, params)
+    while True:
+        rows = c.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        yield rows
+
+### Streams the export into a CSV or Parquet file, one CHUNK_SIZE batch at a time ###
+def export_trips(manager_ID: int, start=None, end=None, fmt: str = "csv") -> bytes:
+    start = iso_date(start)
+    end = iso_date(end)
+    out = io.BytesIO()
+    with connection() as conn:
+        if fmt == "parquet":
+            import pandas as pd
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = pa.schema([
+                ("trip_ID", pa.int64()), ("destination", pa.string()), ("start_date", pa.string()),
+                ("end_date", pa.string()), ("occasion", pa.string()), ("participants", pa.string()),
+            ])
+            with pq.ParquetWriter(out, schema) as writer:
+                for rows in _trip_export_rows(conn, manager_ID, start, end):
+                    chunk = pd.DataFrame(rows, columns=TRIP_COLUMNS)
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        else:
+            with _text_stream(out) as stream:
+                writer = csv.writer(stream)
+                writer.writerow(TRIP_COLUMNS)
+                for rows in _trip_export_rows(conn, manager_ID, start, end):
+                    writer.writerows(rows)
+    return out.getvalue()
+
+### Dict rows from a CSV or Parquet upload, Parquet is read in record batches ###
+def _trip_records(file, fmt: str):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file).iter_batches(batch_size=CHUNK_SIZE):
+            yield from batch.to_pylist()
+    else:
+        with _text_stream(file) as stream:
+            yield from csv.DictReader(stream)
+
+### Canonical YYYY-MM-DD for dates, datetimes and ISO strings; trips.start_date/end_date only accept this form ###
+def iso_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+### Validated (line, trip values, participant IDs) for trips ###
+def _parse_trip_rows(records, report: ImportReport, roster: dict):
+    for line, row in enumerate(records, start=2):
+        destination = (row.get("destination") or "").strip()
+        if not destination:
+            report.error(line, destination, "destination is empty")
+            continue
+        try:
+            start_date = iso_date(row.get("start_date"))
+            end_date = iso_date(row.get("end_date"))
+        except ValueError:
+            report.error(line, destination, "dates have to be YYYY-MM-DD")
+            continue
+        if start_date and end_date and end_date < start_date:
+            report.error(line, destination, "return is before departure")
+            continue
+
+        names = [n.strip() for n in (row.get("participants") or "").split(";") if n.strip()]
+        unknown = [n for n in names if n not in roster]
+        if unknown:
+            report.error(line, destination, f"unknown participants: {', '.join(unknown)}")
+            continue
+
+        occasion = row.get("occasion") or None
+        yield line, (destination, start_date, end_date, occasion), [roster[n] for n in names]
+
+### One transaction per chunk: trips one by one for their IDs, participants in one batch ###
+def _insert_trip_chunk(conn, chunk, manager_ID: int, report: ImportReport):
+    c = conn.cursor()
+    participants = {}
+    for _, values, user_ids in chunk:
+        c.execute(
+            "INSERT INTO trips (destination, start_date, end_date, occasion, manager_ID) VALUES (?, ?, ?, ?, ?)",
+            (*values, manager_ID)
+        )
+        participants[c.lastrowid] = user_ids
+    apply_participants(conn, participants, new_trips=True)
+    conn.commit()
+    report.inserted += len(chunk)
+
+### Bulk import for yearly planning: same columns as the export, trip_ID is ignored ###
+def import_trips(file, manager_ID: int, fmt: str = "csv") -> ImportReport:
+    report = ImportReport()
+    with connection() as conn:
+        roster = {
+            username: user_ID for user_ID, username in conn.execute(
+                "SELECT user_ID, username FROM users WHERE manager_ID = ?", (manager_ID,)
+            )
+        }
+        rows = _parse_trip_rows(_trip_records(file, fmt), report, roster)
+        for chunk in _chunks(rows):
+            _insert_trip_chunk(conn, chunk, manager_ID, report)
+    return report
@@ -0,0 +1,356 @@
+import os
+import sys
+import sqlite3
+import threading
+import streamlit as st
+from db.db_connection import connection
+from db.db_passwords import hash_password
+
+### Numbered schema migrations, PRAGMA user_version stores the last one applied ###
+### Every step has to cope with databases created before versioning existed ###
+
+def _columns(c, table: str):
+    return [row[1] for row in c.execute(f"PRAGMA table_info({table})")]
+
+def _m1_base_tables(c):
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS roles (
+        role TEXT PRIMARY KEY,
+        sortkey INTEGER NOT NULL
+    )
+    """)
+    c.executemany("""
+    INSERT OR IGNORE INTO roles (role, sortkey)
+    VALUES (?, ?)
+    """, [
+        ("Administrator", 3),
+        ("Manager", 2),
+        ("User", 1)
+    ])
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password TEXT NOT NULL,
+        email TEXT,
+        role TEXT NOT NULL,
+        manager_ID INTEGER,
+        FOREIGN KEY (role) REFERENCES roles (role)
+    )
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS trips (
+                        trip_ID INTEGER NOT NULL UNIQUE PRIMARY KEY AUTOINCREMENT,
+                        destination TEXT NOT NULL,
+                        start_date TEXT,
+                        end_date TEXT,
+                        occasion TEXT,
+                        manager_ID INTEGER REFERENCES users(user_ID) ON DELETE SET NULL
+    )
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS user_trips (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        trip_ID INTEGER NOT NULL,
+                        user_ID INTEGER NOT NULL,
+                        UNIQUE (user_ID, trip_ID),
+                        FOREIGN KEY(trip_ID) REFERENCES trips(trip_ID) ON DELETE CASCADE,
+                        FOREIGN KEY(user_ID) REFERENCES users(user_ID) ON DELETE CASCADE
+    )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS ix_user_trips_trip ON user_trips(trip_ID);")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_user_trips_user ON user_trips(user_ID);")
+
+### Early users tables were created without the manager link ###
+def _m2_users_manager(c):
+    if "manager_ID" not in _columns(c, "users"):
+        c.execute("ALTER TABLE users ADD COLUMN manager_ID INTEGER;")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_users_manager ON users(manager_ID);")
+
+### Trip ownership: old trips go to the manager of most of their participants ###
+def _m3_trip_owner(c):
+    if "manager_ID" not in _columns(c, "trips"):
+        c.execute("ALTER TABLE trips ADD COLUMN manager_ID INTEGER REFERENCES users(user_ID) ON DELETE SET NULL;")
+    c.execute("""
+        UPDATE trips SET manager_ID = (
+            SELECT u.manager_ID
+            FROM user_trips ut
+            JOIN users u ON u.user_ID = ut.user_ID
+            WHERE ut.trip_ID = trips.trip_ID
+            AND u.manager_ID IS NOT NULL
+            GROUP BY u.manager_ID
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+        )
+        WHERE manager_ID IS NULL
+    """)
+    c.execute("DROP INDEX IF EXISTS ix_trips_start;")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trips_manager_start ON trips(manager_ID, start_date, trip_ID);")
+
+### Employee trip view: user_trips is read through its UNIQUE (user_ID, trip_ID) index, ###
+### which makes the single-column one redundant; trips get a date index for range filters ###
+def _m4_trip_dates(c):
+    c.execute("DROP INDEX IF EXISTS ix_user_trips_user;")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trips_start_end ON trips(start_date, end_date);")
+
+### Trip dates as canonical YYYY-MM-DD text, enforced by CHECK so string order is date order. ###
+### SQLite cannot add a CHECK to a table, so trips is rebuilt (migrate() runs with foreign keys off); ###
+### datetimes are cut to their date, anything unparsable becomes NULL; a deleted owner leaves its trips unassigned ###
+def _m5_iso_trip_dates(c):
+    seq = c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'trips'").fetchone()
+    c.execute("""
+    CREATE TABLE trips_new (
+                        trip_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                        destination TEXT NOT NULL,
+                        start_date TEXT CHECK (start_date IS NULL OR date(start_date) IS start_date),
+                        end_date TEXT CHECK (end_date IS NULL OR date(end_date) IS end_date),
+                        occasion TEXT,
+                        manager_ID INTEGER REFERENCES users(user_ID) ON DELETE SET NULL
+    )
+    """)
+    c.execute("""
+        INSERT INTO trips_new (trip_ID, destination, start_date, end_date, occasion, manager_ID)
+        SELECT trip_ID, destination, date(substr(start_date, 1, 10)), date(substr(end_date, 1, 10)), occasion, manager_ID
+        FROM trips
+    """)
+    c.execute("DROP TABLE trips;")
+    c.execute("ALTER TABLE trips_new RENAME TO trips;")
+    if seq:
+        # keep IDs of deleted trips from being handed out again
+        c.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'trips'", (seq[0],))
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trips_manager_start ON trips(manager_ID, start_date, trip_ID);")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trips_start_end ON trips(start_date, end_date);")
+
+### Admin user table: NOCASE indexes let `LIKE 'abc%'` run as a prefix range, the others serve the sortable columns ###
+def _m6_user_search(c):
+    c.execute("CREATE INDEX IF NOT EXISTS ix_users_username_nocase ON users(username COLLATE NOCASE);")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_users_email_nocase ON users(email COLLATE NOCASE);")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_users_email_sort ON users(coalesce(email, ''));")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_users_role ON users(role);")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_users_manager_sort ON users(coalesce(manager_ID, 0));")
+
+### Closure table of the manager tree: one row per (ancestor, descendant) pair at any depth, including (user, user, 0). ###
+### Managers that are their own manager are roots; so are users whose manager_ID points at no existing user ###
+def rebuild_user_hierarchy(c):
+    c.execute("DELETE FROM user_hierarchy")
+    # depth is bounded by the number of users, so cycles left over from before the triggers still terminate;
+    # the self-manager check compares against t so ix_users_manager stays covering
+    c.execute("""
+        WITH RECURSIVE tree(ancestor_ID, descendant_ID, depth) AS (
+            SELECT user_ID, user_ID, 0 FROM users
+            UNION ALL
+            SELECT t.ancestor_ID, u.user_ID, t.depth + 1
+            FROM tree t
+            JOIN users u ON u.manager_ID = t.descendant_ID AND u.user_ID <> t.descendant_ID
+            WHERE t.depth < (SELECT count(*) FROM users)
+        )
+        INSERT INTO user_hierarchy (ancestor_ID, descendant_ID, depth)
+        SELECT ancestor_ID, descendant_ID, min(depth) FROM tree GROUP BY ancestor_ID, descendant_ID
+    """)
+
+### Triggers keep the closure table in step with users.manager_ID, so every writer (forms, CSV import, scripts) is covered ###
+def _m7_user_hierarchy(c):
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS user_hierarchy (
+        ancestor_ID INTEGER NOT NULL,
+        descendant_ID INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        PRIMARY KEY (ancestor_ID, descendant_ID)
+    ) WITHOUT ROWID
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS ix_user_hierarchy_descendant ON user_hierarchy(descendant_ID, depth);")
+    rebuild_user_hierarchy(c)
+
+    #new user: itself plus every ancestor of its manager one level further down
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS tr_users_hierarchy_insert AFTER INSERT ON users
+    BEGIN
+        INSERT INTO user_hierarchy (ancestor_ID, descendant_ID, depth) VALUES (NEW.user_ID, NEW.user_ID, 0);
+        INSERT INTO user_hierarchy (ancestor_ID, descendant_ID, depth)
+        SELECT ancestor_ID, NEW.user_ID, depth + 1
+        FROM user_hierarchy
+        WHERE descendant_ID = NEW.manager_ID AND NEW.manager_ID IS NOT NEW.user_ID;
+    END
+    """)
+    #nobody may end up below themselves
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS tr_users_hierarchy_cycle BEFORE UPDATE OF manager_ID ON users
+    WHEN NEW.manager_ID IS NOT NEW.user_ID AND EXISTS (
+        SELECT 1 FROM user_hierarchy WHERE ancestor_ID = NEW.user_ID AND descendant_ID = NEW.manager_ID
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'manager hierarchy cycle');
+    END
+    """)
+    #moved user: cut its subtree from the old ancestors, hang it below the new manager's ancestors
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS tr_users_hierarchy_move AFTER UPDATE OF manager_ID ON users
+    WHEN OLD.manager_ID IS NOT NEW.manager_ID
+    BEGIN
+        DELETE FROM user_hierarchy
+        WHERE descendant_ID IN (SELECT descendant_ID FROM user_hierarchy WHERE ancestor_ID = NEW.user_ID)
+        AND ancestor_ID NOT IN (SELECT descendant_ID FROM user_hierarchy WHERE ancestor_ID = NEW.user_ID);
+        INSERT INTO user_hierarchy (ancestor_ID, descendant_ID, depth)
+        SELECT a.ancestor_ID, s.descendant_ID, a.depth + s.depth + 1
+        FROM user_hierarchy a, user_hierarchy s
+        WHERE a.descendant_ID = NEW.manager_ID AND s.ancestor_ID = NEW.user_ID
+        AND NEW.manager_ID IS NOT NEW.user_ID;
+    END
+    """)
+    #deleted user: its reports keep their manager_ID and become roots, like any dangling manager_ID
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS tr_users_hierarchy_delete AFTER DELETE ON users
+    BEGIN
+        DELETE FROM user_hierarchy
+        WHERE descendant_ID IN (SELECT descendant_ID FROM user_hierarchy WHERE ancestor_ID = OLD.user_ID)
+        AND ancestor_ID NOT IN (
+            SELECT descendant_ID FROM user_hierarchy WHERE ancestor_ID = OLD.user_ID AND descendant_ID IS NOT OLD.user_ID
+        );
+    END
+    """)
+
+### Change counters for the tables whose query results are cached (db_versions.py); every row written bumps its table ###
+def _m8_table_versions(c):
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS table_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    for table in ("users", "trips", "user_trips"):
+        c.execute("INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,))
+        _version_triggers(c, table)
+
+def _version_triggers(c, table: str):
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tr_{table}_version_{event.lower()} AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+        END
+        """)
+
+### Deleting a manager who owns trips failed on the foreign key. Their trips now go to their own manager ###
+### if that is a Manager; otherwise ON DELETE SET NULL leaves them unassigned for an administrator to hand out. ###
+### Older databases get trips rebuilt with the action (the rebuild drops its triggers, so they are recreated) ###
+def _m9_trip_owner_on_delete(c):
+    on_delete = {row[2]: row[6] for row in c.execute("PRAGMA foreign_key_list(trips)")}
+    if on_delete.get("users") != "SET NULL":
+        seq = c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'trips'").fetchone()
+        c.execute("""
+        CREATE TABLE trips_new (
+                            trip_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                            destination TEXT NOT NULL,
+                            start_date TEXT CHECK (start_date IS NULL OR date(start_date) IS start_date),
+                            end_date TEXT CHECK (end_date IS NULL OR date(end_date) IS end_date),
+                            occasion TEXT,
+                            manager_ID INTEGER REFERENCES users(user_ID) ON DELETE SET NULL
+        )
+        """)
+        c.execute("""
+            INSERT INTO trips_new (trip_ID, destination, start_date, end_date, occasion, manager_ID)
+            SELECT trip_ID, destination, start_date, end_date, occasion, manager_ID
+            FROM trips
+        """)
+        c.execute("DROP TABLE trips;")
+        c.execute("ALTER TABLE trips_new RENAME TO trips;")
+        if seq:
+            c.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'trips'", (seq[0],))
+        c.execute("CREATE INDEX IF NOT EXISTS ix_trips_manager_start ON trips(manager_ID, start_date, trip_ID);")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_trips_start_end ON trips(start_date, end_date);")
+        _version_triggers(c, "trips")
+
+    #runs before the foreign key action, so trips that can be handed over never become unassigned
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS tr_users_trips_handover BEFORE DELETE ON users
+    WHEN OLD.manager_ID IS NOT OLD.user_ID
+    AND EXISTS (SELECT 1 FROM users WHERE user_ID = OLD.manager_ID AND role = 'Manager')
+    BEGIN
+        UPDATE trips SET manager_ID = OLD.manager_ID WHERE manager_ID = OLD.user_ID;
+    END
+    """)
+
+MIGRATIONS = [
+    (1, _m1_base_tables),
+    (2, _m2_users_manager),
+    (3, _m3_trip_owner),
+    (4, _m4_trip_dates),
+    (5, _m5_iso_trip_dates),
+    (6, _m6_user_search),
+    (7, _m7_user_hierarchy),
+    (8, _m8_table_versions),
+    (9, _m9_trip_owner_on_delete),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+DEMO_USERS = [
+    ("Admin", "123", "a@gmail.com", "Administrator"),
+    ("Manager", "123", "manager@gmail.com", "Manager"),
+    ("User", "123", "user@gmail.com", "User"),
+]
+
+_migrate_lock = threading.Lock()
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+### Applies every pending migration, each one in its own transaction ###
+### Foreign keys are off meanwhile so tables can be rebuilt, each step is checked before its commit ###
+def migrate() -> int:
+    with _migrate_lock, connection() as conn:
+        conn.execute("PRAGMA foreign_keys = OFF;")
+        try:
+            for number, step in MIGRATIONS:
+                # IMMEDIATE takes the write lock, so a second process waits and then sees the new version
+                conn.execute("BEGIN IMMEDIATE")
+                if schema_version(conn) >= number:
+                    conn.rollback()
+                    continue
+                # rows that were orphaned before (older versions ran without foreign keys) are tolerated
+                orphans = len(conn.execute("PRAGMA foreign_key_check").fetchall())
+                step(conn.cursor())
+                violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+                if len(violations) > orphans:
+                    conn.rollback()
+                    raise sqlite3.IntegrityError(f"migration {number} breaks foreign keys: {violations[:5]}")
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.commit()
+            return schema_version(conn)
+        except BaseException:
+            # the pragma below is ignored inside a transaction, so the failed step has to go first
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON;")
+
+### Inserts the Admin/Manager/User dummies, existing usernames are left alone ###
+def seed_demo_users():
+    with connection() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (username, password, email, role) VALUES (?, ?, ?, ?)",
+            [(username, hash_password(password), email, role) for username, password, email, role in DEMO_USERS]
+        )
+        conn.commit()
+
+@st.cache_resource(show_spinner=False)
+def _seed_once():
+    seed_demo_users()
+    return True
+
+### Called at the top of every page: one PRAGMA read once the schema is current ###
+def ensure_schema(seed_demo: bool | None = None):
+    with connection() as conn:
+        current = schema_version(conn)
+    if current < SCHEMA_VERSION:
+        migrate()
+    if seed_demo is None:
+        seed_demo = os.environ.get("SEED_DEMO_USERS") == "1"
+    if seed_demo:
+        _seed_once()
+
+### python -m db.db_migrations [--seed-demo] ###
+if __name__ == "__main__":
+    print(f"schema version: {migrate()}")
+    if "--seed-demo" in sys.argv:
+        seed_demo_users()
+        print("demo users seeded")
@@ -0,0 +1,103 @@
+import os
+import hmac
+import base64
+import binascii
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+
+### scrypt cost parameters, tunable per deployment through the environment ###
+SCRYPT_N = int(os.environ.get("SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.environ.get("SCRYPT_R", 8))
+SCRYPT_P = int(os.environ.get("SCRYPT_P", 1))
+SALT_BYTES = 16
+HASH_BYTES = 32
+#upper bound for the memory of a stored hash's cost parameters (imports), never below this deployment's own cost
+MAX_SCRYPT_MEMORY = max(256 * 1024 * 1024, 128 * SCRYPT_R * (SCRYPT_N + SCRYPT_P))
+VERIFY_WORKERS = int(os.environ.get("PASSWORD_VERIFY_WORKERS", 4))
+IMPORT_WORKERS = int(os.environ.get("PASSWORD_IMPORT_WORKERS", 2))
+
+PREFIX = "scrypt"
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # scrypt needs about 128 * r * (n + p) bytes, allow twice that
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * r * (n + p), dklen=HASH_BYTES
+    )
+
+### Stored form: scrypt$n$r$p$salt$hash ###
+def hash_password(password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, n, r, p)
+    return f"{PREFIX}${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(PREFIX + "$")
+
+### (n, r, p, salt, digest) of a stored hash, None if it is malformed or its cost is out of range ###
+def _parse_hash(stored: str):
+    fields = stored.split("$")
+    if len(fields) != 6 or fields[0] != PREFIX or not all(f.isascii() and f.isdigit() for f in fields[1:4]):
+        return None
+    n, r, p = int(fields[1]), int(fields[2]), int(fields[3])
+    if n < 2 or n & (n - 1) or r < 1 or p < 1 or 128 * r * (n + p) > MAX_SCRYPT_MEMORY:
+        return None
+    try:
+        salt = base64.b64decode(fields[4], validate=True)
+        digest = base64.b64decode(fields[5], validate=True)
+    except binascii.Error:
+        return None
+    if not salt or not digest:
+        return None
+    return n, r, p, salt, digest
+
+def is_valid_hash(stored: str) -> bool:
+    return _parse_hash(stored) is not None
+
+### Returns (matches, needs_rehash); plaintext rows from before hashing still verify once ###
+### A stored hash that cannot be parsed never matches ###
+def verify_password(password: str, stored: str) -> tuple[bool, bool]:
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")), True
+    parsed = _parse_hash(stored)
+    if parsed is None:
+        return False, False
+    n, r, p, salt, digest = parsed
+    candidate = _scrypt(password, salt, n, r, p)
+    matches = hmac.compare_digest(candidate, digest)
+    return matches, (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+### A bounded pool caps concurrent scrypt runs (CPU and memory) across all sessions ###
+@st.cache_resource(show_spinner=False)
+def get_verify_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=VERIFY_WORKERS, thread_name_prefix="pw-verify")
+
+def verify_password_pooled(password: str, stored: str) -> tuple[bool, bool]:
+    return get_verify_pool().submit(verify_password, password, stored).result()
+
+### Bulk imports hash on their own pool, so logins never queue behind a file ###
+@st.cache_resource(show_spinner=False)
+def get_import_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="pw-import")
+
+### Hashes passwords in order with at most IMPORT_WORKERS of them queued at a time, ###
+### so concurrent imports take turns on the pool instead of one file filling it up ###
+def hash_passwords(passwords):
+    pool = get_import_pool()
+    pending = deque()
+    for password in passwords:
+        if len(pending) >= IMPORT_WORKERS:
+            yield pending.popleft().result()
+        pending.append(pool.submit(hash_password, password))
+    while pending:
+        yield pending.popleft().result()
+
+### Hash of a random password, verified against when the username is unknown to keep timing even ###
+@st.cache_resource(show_spinner=False)
+def dummy_hash() -> str:
+    return hash_password(_b64(os.urandom(SALT_BYTES)))
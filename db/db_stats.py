@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+import streamlit as st
+
+### Query/page timing, on unless QUERY_STATS=0; only the last SAMPLES_PER_KEY samples per statement are kept ###
+ENABLED = os.environ.get("QUERY_STATS", "1") != "0"
+SAMPLES_PER_KEY = 1000
+
+_IN_LIST = re.compile(r"IN \(\?(?:\s*,\s*\?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+#frames from these modules are skipped when looking for the calling function
+_PLUMBING = ("db.db_stats", "db.db_connection", "contextlib", "pandas", "sqlite3")
+
+### One execute() including the fetches that followed it ###
+@dataclass(slots=True)
+class Sample:
+    duration: float
+    rows: int = 0
+
+@dataclass(slots=True)
+class _Series:
+    samples: deque = field(default_factory=lambda: deque(maxlen=SAMPLES_PER_KEY))
+    count: int = 0
+    callers: Counter = field(default_factory=Counter)
+    shapes: Counter = field(default_factory=Counter)
+
+def normalize(sql: str) -> str:
+    # IN lists of different lengths are one statement
+    return _IN_LIST.sub("IN (?…)", _SPACES.sub(" ", sql).strip())
+
+def param_shape(params) -> str:
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(sorted(params)) + "}"
+    return f"({len(params)})"
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_PLUMBING):
+            return f"{module}.{frame.f_code.co_qualname.replace('.<locals>', '')}"
+        frame = frame.f_back
+    return "?"
+
+def _percentile(ordered: list, q: float) -> float:
+    # nearest rank, ordered is sorted ascending and not empty
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+### Thread-safe store of query and page timings ###
+class QueryStats:
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, key: str, sample: Sample, caller: str = "", shape: str = ""):
+        with self._lock:
+            series = self._series.get((kind, key))
+            if series is None:
+                series = self._series[(kind, key)] = _Series()
+            series.samples.append(sample)
+            series.count += 1
+            if caller:
+                series.callers[caller] += 1
+            if shape:
+                series.shapes[shape] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    ### count, p50/p95/p99 in ms and mean rows per statement or page, slowest p95 first ###
+    def summary(self) -> list:
+        with self._lock:
+            items = [
+                (kind, key, series.count, list(series.samples), dict(series.callers), dict(series.shapes))
+                for (kind, key), series in self._series.items()
+            ]
+        rows = []
+        for kind, key, count, samples, callers, shapes in items:
+            durations = sorted(s.duration * 1000 for s in samples)
+            rows.append({
+                "kind": kind,
+                "statement": key,
+                "count": count,
+                "p50_ms": round(_percentile(durations, 0.50), 3),
+                "p95_ms": round(_percentile(durations, 0.95), 3),
+                "p99_ms": round(_percentile(durations, 0.99), 3),
+                "max_ms": round(durations[-1], 3),
+                "mean_rows": round(sum(s.rows for s in samples) / len(samples), 1),
+                "callers": callers,
+                "param_shapes": shapes,
+            })
+        rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+        return rows
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2, ensure_ascii=False)
+
+### One store per process, shared by all sessions ###
+@st.cache_resource(show_spinner=False)
+def get_query_stats() -> QueryStats:
+    return QueryStats()
+
+### Cursor that times execute() and the fetches after it into one Sample ###
+class InstrumentedCursor(sqlite3.Cursor):
+    _sample = None
+
+    def _timed(self, method, sql, params, shape):
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            sample = Sample(time.perf_counter() - start)
+            if self.rowcount > 0:
+                sample.rows = self.rowcount
+            self._sample = sample
+            self.connection.stats.record("query", normalize(sql), sample, _caller(), shape)
+
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params, param_shape(params))
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed(super().executemany, sql, seq_of_params, "many")
+
+    def _fetched(self, start, rows: int):
+        if self._sample is not None:
+            self._sample.duration += time.perf_counter() - start
+            self._sample.rows += rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+### Connection whose cursors (also those of conn.execute) are instrumented ###
+class InstrumentedConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = get_query_stats()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # sqlite3 does not route these through cursor()
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+### Render time of one script run: `with track_page(...):` around the whole page. st.rerun, st.switch_page ###
+### and st.stop end a run by raising, so the time is recorded on the way out, for those runs as well ###
+class PageTimer:
+    __slots__ = ("page", "start")
+
+    def __init__(self, page: str):
+        self.page = page
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.done()
+        return False
+
+    def done(self):
+        if ENABLED:
+            get_query_stats().record("page", self.page, Sample(time.perf_counter() - self.start))
+
+def track_page(page: str) -> PageTimer:
+    return PageTimer(page)
+
+### Admin panel: slowest statements and pages, JSON dump and reset ###
+@st.fragment
+def query_stats_panel(title: str = "Performance"):
+    stats = get_query_stats()
+    with st.expander(title, expanded=False):
+        if not ENABLED:
+            st.info("Query statistics are turned off (QUERY_STATS=0).")
+            return
+        summary = stats.summary()
+        if not summary:
+            st.info("No queries recorded yet.")
+            return
+
+        import pandas as pd
+        df = pd.DataFrame(summary)
+        df["callers"] = df["callers"].map(lambda callers: ", ".join(sorted(callers, key=callers.get, reverse=True)))
+        df["param_shapes"] = df["param_shapes"].map(lambda shapes: ", ".join(shapes))
+
+        st.markdown("**Pages**")
+        st.dataframe(
+            df[df["kind"] == "page"][["statement", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"]]
+            .rename(columns={"statement": "page"}),
+            hide_index=True, use_container_width=True
+        )
+        st.markdown("**Queries**")
+        st.dataframe(
+            df[df["kind"] == "query"].drop(columns="kind"),
+            hide_index=True, use_container_width=True
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "Download as JSON", data=stats.to_json, file_name="query_stats.json",
+                mime="application/json", on_click="ignore"
+            )
+        with col2:
+            if st.button("Reset statistics"):
+                stats.clear()
+                st.rerun(scope="fragment")
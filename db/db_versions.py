@@ -0,0 +1,44 @@
+import threading
+import streamlit as st
+from db import db_connection
+from db.db_cache import cached
+
+### Per-table change versions: triggers count the rows written to users, trips and user_trips in table_versions. ###
+### A watcher connection that never writes sees PRAGMA data_version move whenever any other connection, in any ###
+### process, commits; only then are the counters read again, so a rerun with nothing changed costs one PRAGMA ###
+class TableVersions:
+    def __init__(self, path: str):
+        self.path = path
+        self.checks = 0
+        self.reloads = 0
+        self._conn = None
+        self._data_version = None
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def current(self) -> dict:
+        with self._lock:
+            if self._conn is None:
+                self._conn = db_connection._open_connection(self.path, readonly=True)
+            self.checks += 1
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._versions = dict(self._conn.execute("SELECT name, version FROM table_versions").fetchall())
+                self._data_version = data_version
+                self.reloads += 1
+            return self._versions
+
+### One watcher per process and database file ###
+@st.cache_resource(show_spinner=False)
+def get_table_versions(path: str) -> TableVersions:
+    return TableVersions(path)
+
+def versions(*tables) -> tuple:
+    current = get_table_versions(db_connection.DB_PATH).current()
+    return tuple(current.get(table, 0) for table in tables)
+
+### Read-through cache for query results: the key carries the versions of the tables the query reads, ###
+### so a write to one of them makes the next call load again and stale entries age out of the LRU ###
+### Results are shared by all sessions and must not be mutated ###
+def cached_query(key: tuple, tables: tuple, loader):
+    return cached((*key, db_connection.DB_PATH, versions(*tables)), loader)
@@ -0,0 +1,132 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+import streamlit as st
+from db import db_connection
+from db.db_connection import connection, mark_write
+
+### Optional write-behind mode (WRITE_BEHIND=1): every write() goes to one writer thread per database file, ###
+### which commits whatever queued up meanwhile in a single transaction; off, write() commits on a pooled connection ###
+WRITE_BEHIND = os.environ.get("WRITE_BEHIND") == "1"
+MAX_BATCH = 64
+WRITE_TIMEOUT_S = 30
+
+_STOP = object()
+
+### Single writer: requests run one after another on its own connection, each inside a savepoint ###
+### so a failing request is rolled back alone and the rest of the batch still commits ###
+class WriteQueue:
+    def __init__(self, path: str):
+        self.path = path
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"db-writer {path}", daemon=True)
+        self._thread.start()
+
+    ### fn(conn) runs on the writer thread and must not commit; the future resolves after the commit ###
+    def submit(self, fn) -> Future:
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        while len(batch) < MAX_BATCH and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = db_connection._open_connection(self.path)
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                if batch:
+                    try:
+                        self._commit(conn, batch)
+                    except Exception as e:
+                        # e.g. BEGIN hitting the busy timeout: fail this batch, keep the writer alive
+                        conn = self._fail(conn, batch, e)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    ### Rolls back and fails every future of the batch that is not resolved yet ###
+    ### A connection that cannot even roll back is replaced, the returned one is used from then on ###
+    def _fail(self, conn: sqlite3.Connection, batch: list, error: Exception) -> sqlite3.Connection:
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            try:
+                conn = db_connection._open_connection(self.path)
+            except sqlite3.Error:
+                pass  #still closed: the next batch fails the same way and tries again
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+        return conn
+
+    def _commit(self, conn: sqlite3.Connection, batch: list):
+        outcomes = []
+        conn.execute("BEGIN IMMEDIATE")
+        for fn, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            conn.execute("SAVEPOINT request")
+            try:
+                result = fn(conn)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO request")
+                    conn.execute("RELEASE request")
+                else:
+                    #some errors (disk full, I/O) abort the whole transaction, the batch so far went with it
+                    outcomes = [(done, None, error or e) for done, _, error in outcomes]
+                    conn.execute("BEGIN IMMEDIATE")
+                outcomes.append((future, None, e))
+            else:
+                conn.execute("RELEASE request")
+                outcomes.append((future, result, None))
+        try:
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            outcomes = [(future, None, error or e) for future, _, error in outcomes]
+        self.batches += 1
+        self.requests += len(batch)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+### One writer per process and database file ###
+@st.cache_resource(show_spinner=False)
+def get_writer(path: str) -> WriteQueue:
+    return WriteQueue(path)
+
+### Runs fn(conn) in a transaction and returns its result, errors such as IntegrityError are raised here ###
+### In write-behind mode the call waits for the writer's group commit instead of committing itself ###
+def write(fn):
+    if WRITE_BEHIND:
+        result = get_writer(db_connection.DB_PATH).submit(fn).result(timeout=WRITE_TIMEOUT_S)
+    else:
+        with connection() as conn:
+            result = fn(conn)
+            conn.commit()
+    mark_write()
+    return result
@@ -1,29 +1,35 @@
 import streamlit as st
-import pandas as pd
 import sqlite3
-from db.db_functions_users import register_user_dropdown_admin, edit_user_dropdown_admin, get_users_under_me, del_user_dropdown_admin
-st.set_page_config(page_title="Admin Dashboard", layout="wide")
-st.title("Admin Dashboard")
+from db.db_functions_users import register_user_dropdown_admin, import_users_dropdown_admin, edit_user_dropdown_admin, user_table_view, del_user_dropdown_admin
+from db.db_functions_trips import unassigned_trips_dropdown_admin
+from db.db_migrations import ensure_schema
+from db.db_stats import track_page, query_stats_panel
+from db.db_flash import show_flashes
+with track_page("admin_overview"):
+    st.set_page_config(page_title="Admin Dashboard", layout="wide")
+    st.title("Admin Dashboard")
+    ensure_schema()
+    show_flashes()
 
-### Access control, so only admin can access this page ###
-if "role" not in st.session_state or st.session_state["role"] != "Administrator":
-    st.error("Access denied. Please log in as Administrator.")
-    st.stop()
+    ### Access control, so only admin can access this page ###
+    if "role" not in st.session_state or st.session_state["role"] != "Administrator":
+        st.error("Access denied. Please log in as Administrator.")
+        st.stop()
 
 
-left, right = st.columns([4, 2], gap="large")
-with left:
-    st.subheader("Table")
-    df = get_users_under_me()         
-    if df is None:
-        st.warning("Fehlender Kontext: 'role_sortkey' ist nicht im session_state.")
-    elif df.empty:
-        st.info("Keine Benutzer unter deiner Rolle.")
-    else:
-        st.dataframe(df, use_container_width=True)
+    left, right = st.columns([4, 2], gap="large")
+    with left:
+        st.subheader("Table")
+        user_table_view()
 
-with right:
-    st.subheader("User Management")
-    register_user_dropdown_admin()
-    del_user_dropdown_admin()
-    edit_user_dropdown_admin(title="Edit user")
\ No newline at end of file
+    with right:
+        st.subheader("User Management")
+        register_user_dropdown_admin()
+        import_users_dropdown_admin()
+        del_user_dropdown_admin()
+        edit_user_dropdown_admin(title="Edit user")
+        unassigned_trips_dropdown_admin()
+
+    ### rendered last so the queries of this run are already counted ###
+    with left:
+        query_stats_panel()
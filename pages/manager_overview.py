@@ -1,27 +1,33 @@
 import streamlit as st
-from db.db_functions_users import register_user_dropdown, del_user_dropdown, edit_user_dropdown
-from db.db_functions_trips import create_trip_dropdown, del_trip_dropdown, create_trip_table, create_trip_users_table, trip_list_view
-st.set_page_config(page_title="Manager Overview", layout="wide")
-st.title("Manager Dashboard")
-create_trip_table()
-create_trip_users_table()
+from db.db_functions_users import register_user_dropdown, import_users_dropdown, del_user_dropdown, edit_user_dropdown
+from db.db_functions_trips import create_trip_dropdown, del_trip_dropdown, trip_import_export_dropdown, trip_list_view
+from db.db_migrations import ensure_schema
+from db.db_stats import track_page
+from db.db_flash import show_flashes
+with track_page("manager_overview"):
+    st.set_page_config(page_title="Manager Overview", layout="wide")
+    st.title("Manager Dashboard")
+    ensure_schema()
+    show_flashes()
 
-### Access control, so only managers can access this page ###
-if "role" not in st.session_state or st.session_state["role"] != "Manager":
-    st.error("Access denied. Please log in as Manager.")
-    st.stop()
+    ### Access control, so only managers can access this page ###
+    if "role" not in st.session_state or st.session_state["role"] != "Manager":
+        st.error("Access denied. Please log in as Manager.")
+        st.stop()
 
-left, right = st.columns([4, 2], gap="large")
+    left, right = st.columns([4, 2], gap="large")
 
-with right:
-    st.subheader("User-Management")
-    register_user_dropdown()
-    edit_user_dropdown()
-    del_user_dropdown()
-    st. subheader("Trip-Management")
-    create_trip_dropdown()
-    del_trip_dropdown()
+    with right:
+        st.subheader("User-Management")
+        register_user_dropdown()
+        import_users_dropdown()
+        edit_user_dropdown()
+        del_user_dropdown()
+        st. subheader("Trip-Management")
+        create_trip_dropdown()
+        del_trip_dropdown()
+        trip_import_export_dropdown()
 
-with left:
-    st.subheader("Trip-Overview")
-    trip_list_view()
\ No newline at end of file
+    with left:
+        st.subheader("Trip-Overview")
+        trip_list_view()
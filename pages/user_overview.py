@@ -1,66 +1,70 @@
 import streamlit as st
-import pandas as pd
 from datetime import date
 from db.db_functions_users import edit_own_profile
-from db.db_functions_usertrips import get_user_trips
+from db.db_functions_usertrips import get_user_trips, user_has_trips
+from db.db_migrations import ensure_schema
+from db.db_stats import track_page
+from db.db_flash import show_flashes
+with track_page("user_overview"):
 
-# --- Page setup ---
-st.set_page_config(page_title="Employee Dashboard", layout="wide")
-st.title("Employee Dashboard")
+    # --- Page setup ---
+    st.set_page_config(page_title="Employee Dashboard", layout="wide")
+    st.title("Employee Dashboard")
+    ensure_schema()
+    show_flashes()
 
-# --- Access control ---
-if "role" not in st.session_state or st.session_state["role"] != "User":
-    st.error("Access denied. Please log in as User.")
-    st.stop()
-
-# --- Layout ---
-left, right = st.columns([4, 2], gap="large")
-
-# --- LEFT COLUMN: Trip Overview ---
-with left:
-    st.subheader("Trip Overview")
-
-    user_id = st.session_state.get("user_id", None)
-    if user_id is None:
-        st.warning("No user logged in. Please log in first.")
+    # --- Access control ---
+    if "role" not in st.session_state or st.session_state["role"] != "User":
+        st.error("Access denied. Please log in as User.")
         st.stop()
 
-    # Fetch trips from the DB
-    trips = get_user_trips(user_id)
+    # --- Layout ---
+    left, right = st.columns([4, 2], gap="large")
 
-    if trips is None or trips.empty:
-        st.info("You have no trips recorded yet.")
-    else:
-        trips["date_start"] = pd.to_datetime(trips["date_start"])
-        trips["date_end"] = pd.to_datetime(trips["date_end"])
+    # --- LEFT COLUMN: Trip Overview ---
+    with left:
+        st.subheader("Trip Overview")
 
-        # --- Calendar filter ---
-        st.markdown("### 📅 Filter trips by date range")
-        date_range = st.date_input(
-            "Select a date or range",
-            value=(date.today(), date.today()),
-            help="Pick one day or a range to see matching trips",
-        )
+        user_ID = st.session_state.get("user_ID", None)
+        if user_ID is None:
+            st.warning("No user logged in. Please log in first.")
+            st.stop()
 
-        # Handle single vs range selection
-        if isinstance(date_range, tuple):
-            start_date, end_date = date_range
+        if not user_has_trips(user_ID):
+            st.info("You have no trips recorded yet.")
         else:
-            start_date = end_date = date_range
+            # --- Calendar filter ---
+            st.markdown("### 📅 Filter trips by date range")
+            date_range = st.date_input(
+                "Select a date or range",
+                value=(date.today(), date.today()),
+                help="Pick one day or a range to see matching trips",
+            )
 
-        # Filter trips that overlap with the chosen date(s)
-        mask = (trips["date_start"] <= end_date) & (trips["date_end"] >= start_date)
-        filtered = trips.loc[mask].sort_values("date_start", ascending=False)
+            # Handle single vs range selection (a range has one date while it is being picked, none when cleared)
+            if isinstance(date_range, tuple):
+                start_date, end_date = (date_range[0], date_range[-1]) if date_range else (None, None)
+            else:
+                start_date = end_date = date_range
 
-        if filtered.empty:
-            st.warning("No trips found for the selected date(s).")
-        else:
-            st.dataframe(
-                filtered[["destination", "date_start", "date_end", "budget", "status"]],
-                use_container_width=True,
-                hide_index=True
-            )
+            # Trips that overlap with the chosen date(s), filtered and sorted in SQL
+            trips = get_user_trips(user_ID, start_date, end_date)
+
+            if not trips:
+                st.warning("No trips found for the selected date(s).")
+            else:
+                st.dataframe(
+                    trips,
+                    column_config={
+                        "destination": "Destination",
+                        "start_date": "Departure",
+                        "end_date": "Return",
+                        "occasion": "Occasion",
+                    },
+                    use_container_width=True,
+                    hide_index=True
+                )
 
-# --- RIGHT COLUMN: Edit Profile ---
-with right:
-    edit_own_profile()
+    # --- RIGHT COLUMN: Edit Profile ---
+    with right:
+        edit_own_profile()